@@ -0,0 +1,173 @@
+# artifact_cache.py
+import os
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import inspect
+import logging
+
+CACHE_DIR = 'cache'
+CACHE_MAX_BYTES = 20 * 2**30
+META_FILE = 'cache_entry.json'
+
+
+def fingerprint(value):
+    """SHA-256 of a JSON-serializable value in canonical form"""
+    payload = json.dumps(value, sort_keys=True, default=str).encode()
+    return hashlib.sha256(payload).hexdigest()
+
+
+def code_version(*objects):
+    """Hash of the source of modules, functions or files a stage depends on
+
+    Hashing the source itself, rather than a commit id, also catches
+    uncommitted edits, and leaves the key alone when unrelated code changes.
+    """
+    digest = hashlib.sha256()
+    for obj in objects:
+        if isinstance(obj, str):
+            with open(obj, 'rb') as f:
+                digest.update(f.read())
+        else:
+            digest.update(inspect.getsource(obj).encode())
+    return digest.hexdigest()
+
+
+def directory_snapshot(path):
+    """Fingerprint of a directory from its file names, sizes and modification times"""
+    entries = []
+    for root, _, names in os.walk(path):
+        for name in sorted(names):
+            full = os.path.join(root, name)
+            stat = os.stat(full)
+            entries.append([os.path.relpath(full, path), stat.st_size, stat.st_mtime_ns])
+    return fingerprint(sorted(entries))
+
+
+def link_tree(src, dst):
+    """Materialize a directory by hard-linking its files, copying across filesystems
+
+    Linked files share storage with the source, so whoever rewrites them
+    must replace the file rather than write into it.
+    """
+    def link_or_copy(source, target):
+        try:
+            os.link(source, target)
+        except OSError:
+            shutil.copy2(source, target)
+
+    if os.path.exists(dst):
+        shutil.rmtree(dst)
+    shutil.copytree(src, dst, copy_function=link_or_copy)
+
+
+def link_file(src, dst):
+    """Hard-link (or copy) one file into place, replacing what was there"""
+    tmp = f"{dst}.{uuid.uuid4().hex}.tmp"
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copy2(src, tmp)
+    os.replace(tmp, dst)
+
+
+def path_size(path):
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path) for name in names
+    )
+
+
+class ArtifactCache:
+    """Content-addressed store of stage outputs with size-bounded LRU eviction
+
+    Each entry is a directory named by the key of the inputs that produced
+    it: the input data snapshot, the stage config and the code version. An
+    entry is built in a temporary directory and renamed into place, so a
+    crashed build never leaves a half-written entry behind. When the cache
+    outgrows ``max_bytes`` the least recently used entries are deleted.
+    """
+
+    def __init__(self, root=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def key(stage, **inputs):
+        """Cache key of a stage run, e.g. key('dataset', snapshot=..., config=..., code=...)"""
+        return f"{stage}-{fingerprint(inputs)[:32]}"
+
+    def entry_path(self, key):
+        return os.path.join(self.root, key)
+
+    def get(self, key):
+        """Path of a complete entry, marked as just used, or None on a miss"""
+        path = self.entry_path(key)
+        meta_path = os.path.join(path, META_FILE)
+        if not os.path.exists(meta_path):
+            logging.info(f"Cache miss for {key}")
+            return None
+        with open(meta_path) as f:
+            meta = json.load(f)
+        meta['last_used'] = time.time()
+        self._write_meta(path, meta)
+        logging.info(f"Cache hit for {key}")
+        return path
+
+    def put(self, key, build, inputs=None):
+        """Create an entry by calling build(directory) on an empty directory"""
+        tmp = os.path.join(self.root, f".tmp-{key}-{uuid.uuid4().hex}")
+        os.makedirs(tmp)
+        try:
+            build(tmp)
+            now = time.time()
+            self._write_meta(tmp, {
+                'key': key,
+                'inputs': inputs or {},
+                'created': now,
+                'last_used': now,
+                'size_bytes': path_size(tmp)
+            })
+            path = self.entry_path(key)
+            if os.path.exists(path):
+                shutil.rmtree(path)
+            os.replace(tmp, path)
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        logging.info(f"Cached {key}")
+        self.evict(keep=key)
+        return path
+
+    def entries(self):
+        """Metadata of every complete entry"""
+        entries = []
+        for name in os.listdir(self.root):
+            meta_path = os.path.join(self.root, name, META_FILE)
+            if name.startswith('.') or not os.path.exists(meta_path):
+                continue
+            with open(meta_path) as f:
+                entries.append(dict(json.load(f), path=os.path.join(self.root, name)))
+        return entries
+
+    def evict(self, keep=None):
+        """Delete least recently used entries until the cache fits in max_bytes"""
+        entries = sorted(self.entries(), key=lambda entry: entry['last_used'])
+        total = sum(entry['size_bytes'] for entry in entries)
+        for entry in entries:
+            if total <= self.max_bytes:
+                break
+            if entry['key'] == keep:
+                continue
+            shutil.rmtree(entry['path'], ignore_errors=True)
+            total -= entry['size_bytes']
+            logging.info(f"Evicted {entry['key']} ({entry['size_bytes'] / 1e6:.1f} MB)")
+
+    @staticmethod
+    def _write_meta(path, meta):
+        tmp = os.path.join(path, f"{META_FILE}.tmp")
+        with open(tmp, 'w') as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp, os.path.join(path, META_FILE))
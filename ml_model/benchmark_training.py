@@ -0,0 +1,214 @@
+# benchmark_training.py
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+import tensorflow as tf
+from dataset_store import write_processed_dataset, read_processed_dataset
+from input_pipeline import TRAIN_SPLIT, count_windows, make_window_dataset
+from lstm_model import MaintenanceLSTM
+from sequences import TIME_STEPS
+from train import preprocess_and_save_sequences
+from training_profiles import PROFILES, resolve_profile, apply_profile
+
+
+def make_synthetic_dataset(n_machines, n_hours, n_features, positive_rate=0.05, seed=42):
+    """Build a frame shaped like the processed dataset: ids, time, features, label"""
+    rng = np.random.default_rng(seed)
+    start = np.datetime64('2024-01-01T00:00:00', 'ns')
+    hours = np.arange(n_hours, dtype=np.int64) * 3_600_000_000_000
+
+    df = pd.DataFrame({
+        'machine_id': np.repeat(np.arange(1, n_machines + 1, dtype=np.int32), n_hours),
+        'timestamp': start + np.tile(hours, n_machines),
+    })
+    features = rng.normal(size=(len(df), n_features)).astype(np.float32)
+    for i in range(n_features):
+        df[f'feature_{i}'] = features[:, i]
+    df['needs_maintenance'] = (rng.random(len(df)) < positive_rate).astype(np.int8)
+    return df
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process and its finished children, in MB"""
+    scale = 1 if sys.platform == 'darwin' else 1024  # ru_maxrss is KB on Linux
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale
+    return {'self': own / 2**20, 'children': children / 2**20}
+
+
+def path_size(path):
+    """Bytes on disk of a file or of every file under a directory"""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path) for name in names
+    )
+
+
+class EpochTimer(tf.keras.callbacks.Callback):
+    """Record wall time and training throughput of every epoch"""
+
+    def __init__(self, samples):
+        super().__init__()
+        self.samples = samples
+        self.epochs = []
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self.start = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        seconds = time.perf_counter() - self.start
+        self.epochs.append({
+            'epoch': epoch + 1,
+            'seconds': seconds,
+            'samples_per_sec': self.samples / seconds
+        })
+
+
+class StageTimer:
+    """Time named pipeline stages and note the peak RSS after each"""
+
+    def __init__(self):
+        self.stages = {}
+
+    def run(self, name, func):
+        start = time.perf_counter()
+        result = func()
+        self.stages[name] = {'seconds': time.perf_counter() - start, 'peak_rss_mb': peak_rss_mb()}
+        print(f"{name:<16} {self.stages[name]['seconds']:8.2f}s")
+        return result
+
+
+def compare_reports(baseline, report):
+    """Print each stage's time and the steady-state throughput relative to a baseline run"""
+    print(f"{'stage':<16} {'baseline':>9} {'current':>9} {'change':>8}")
+    for name, stage in report['stages'].items():
+        if name not in baseline['stages']:
+            continue
+        before, after = baseline['stages'][name]['seconds'], stage['seconds']
+        print(f"{name:<16} {before:8.2f}s {after:8.2f}s {(after / before - 1) * 100:+7.1f}%")
+
+    # The first epoch includes graph tracing, so compare the later ones
+    def throughput(epochs):
+        steady = epochs[1:] or epochs
+        return np.mean([epoch['samples_per_sec'] for epoch in steady])
+
+    before, after = throughput(baseline['epochs']), throughput(report['epochs'])
+    print(f"{'samples/s':<16} {before:9.0f} {after:9.0f} {(after / before - 1) * 100:+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the training pipeline end to end')
+    parser.add_argument('--machines', type=int, default=50)
+    parser.add_argument('--hours', type=int, default=2000)
+    parser.add_argument('--features', type=int, default=28)
+    parser.add_argument('--epochs', type=int, default=2)
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='default')
+    parser.add_argument('--batch-size', type=int, default=None,
+                        help="Override the profile's batch size")
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='Processes used to write the sequence store')
+    parser.add_argument('--workdir', default=None,
+                        help='Where artifacts are written and left (a temporary directory by default)')
+    parser.add_argument('--keep', action='store_true',
+                        help='Keep the temporary directory afterwards')
+    parser.add_argument('--output', default=None, help='Write the JSON report here')
+    parser.add_argument('--compare', default=None, metavar='BASELINE',
+                        help='JSON report of an earlier run to compare against')
+    args = parser.parse_args()
+
+    # Only a directory created here is removed afterwards, never one passed in
+    created = args.workdir is None
+    workdir = tempfile.mkdtemp(prefix='benchmark_training_') if created else args.workdir
+    os.makedirs(workdir, exist_ok=True)
+    dataset_dir = os.path.join(workdir, 'dataset')
+    store_dir = os.path.join(workdir, 'sequences')
+    scaler_path = os.path.join(workdir, 'scaler.joblib')
+    model_path = os.path.join(workdir, 'model.h5')
+    print(f"Fleet: {args.machines} machines x {args.hours} hours x {args.features} features "
+          f"= {args.machines * args.hours:,} rows")
+
+    config = resolve_profile(args.profile, args.batch_size)
+    apply_profile(config)
+
+    timer = StageTimer()
+    try:
+        df = timer.run('generate', lambda: make_synthetic_dataset(
+            args.machines, args.hours, args.features
+        ))
+        timer.run('write_dataset', lambda: write_processed_dataset(df, dataset_dir))
+        del df
+        timer.run('load_dataset', lambda: len(read_processed_dataset(dataset_dir)))
+        store = timer.run('sequence', lambda: preprocess_and_save_sequences(
+            dataset_dir, store_dir, TIME_STEPS, n_jobs=args.jobs, scaler_path=scaler_path
+        ))
+
+        train_data = make_window_dataset(store, TRAIN_SPLIT, batch_size=config['batch_size'],
+                                         seed=42)
+        samples = count_windows(store, TRAIN_SPLIT)
+        timer.run('sample_epoch', lambda: sum(1 for _ in train_data))
+
+        model = MaintenanceLSTM(
+            (store.time_steps, store.n_features),
+            learning_rate=config['learning_rate'],
+            jit_compile=config['jit_compile'],
+            unroll=config['unroll'],
+            lstm_implementation=config['lstm_implementation']
+        )
+        epoch_timer = EpochTimer(samples)
+        timer.run('fit', lambda: model.model.fit(
+            train_data, epochs=args.epochs, callbacks=[epoch_timer], verbose=0
+        ))
+        timer.run('save_model', lambda: model.model.save(model_path))
+
+        report = {
+            'config': vars(args),
+            'training_profile': config,
+            'environment': {
+                'python': platform.python_version(),
+                'tensorflow': tf.__version__,
+                'numpy': np.__version__,
+                'pandas': pd.__version__,
+                'cpu_count': os.cpu_count(),
+                'platform': platform.platform()
+            },
+            'rows': args.machines * args.hours,
+            'train_windows': samples,
+            'stages': timer.stages,
+            'epochs': epoch_timer.epochs,
+            'peak_rss_mb': peak_rss_mb(),
+            'artifact_bytes': {
+                'dataset': path_size(dataset_dir),
+                'sequences': path_size(store_dir),
+                'scaler': path_size(scaler_path),
+                'model': path_size(model_path)
+            }
+        }
+    finally:
+        if created and not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    for epoch in report['epochs']:
+        print(f"epoch {epoch['epoch']}: {epoch['samples_per_sec']:,.0f} samples/s")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+    else:
+        print(json.dumps(report, indent=2))
+    if args.compare:
+        with open(args.compare) as f:
+            compare_reports(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
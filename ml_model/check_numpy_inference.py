@@ -0,0 +1,127 @@
+# check_numpy_inference.py
+import os
+import sys
+import json
+import argparse
+import subprocess
+import tempfile
+import numpy as np
+
+SERVICE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'service')
+
+# Run in a fresh interpreter so startup time and memory include the imports
+PROBE = r"""
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+from models.maintenance_predictor import MaintenancePredictor
+predictor = MaintenancePredictor(sys.argv[2])
+loaded = time.perf_counter() - start
+import numpy as np
+x = np.random.default_rng(0).normal(size=(1,) + tuple(int(d) for d in sys.argv[3:])).astype('float32')
+predictor.predict(x)
+times = []
+for _ in range(50):
+    t = time.perf_counter()
+    predictor.predict(x)
+    times.append(time.perf_counter() - t)
+print(json.dumps({
+    'startup_s': loaded,
+    'latency_ms_p50': float(np.percentile(times, 50) * 1e3),
+    'latency_ms_p99': float(np.percentile(times, 99) * 1e3),
+    # VmHWM, not ru_maxrss: the latter carries over the parent's peak across exec
+    'peak_rss_mb': int([line for line in open('/proc/self/status')
+                        if line.startswith('VmHWM')][0].split()[1]) / 1024,
+    'tensorflow_loaded': 'tensorflow' in sys.modules
+}))
+"""
+
+
+def check_parity(model, numpy_model, windows, tolerance):
+    """Largest absolute difference between Keras and NumPy probabilities"""
+    expected = model.predict(windows, verbose=0)
+    actual = numpy_model.predict(windows)
+    max_diff = float(np.abs(expected - actual).max())
+    print(f"Parity over {len(windows)} windows: max |keras - numpy| = {max_diff:.2e}")
+    if max_diff > tolerance:
+        raise SystemExit(f"Parity check failed: {max_diff:.2e} > {tolerance:.0e}")
+    return max_diff
+
+
+def probe(model_path, input_shape):
+    """Startup, latency and memory of MaintenancePredictor in a fresh process"""
+    result = subprocess.run(
+        [sys.executable, '-c', PROBE, SERVICE_DIR, model_path] + [str(d) for d in input_shape],
+        capture_output=True, text=True, check=True,
+        env=dict(os.environ, TF_CPP_MIN_LOG_LEVEL='3')
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Check the NumPy inference engine against Keras and compare their cost'
+    )
+    parser.add_argument('--model', default=None,
+                        help='Trained .h5 model (an untrained MaintenanceLSTM by default)')
+    parser.add_argument('--store', default=None,
+                        help='Sequence store whose windows are used (random inputs by default)')
+    parser.add_argument('--windows', type=int, default=512)
+    parser.add_argument('--tolerance', type=float, default=1e-5)
+    parser.add_argument('--output', default=None, help='Write the JSON report here')
+    args = parser.parse_args()
+
+    os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
+    from tensorflow.keras.models import load_model
+    from export_numpy_model import export_numpy_model
+    sys.path.insert(0, SERVICE_DIR)
+    from models.numpy_lstm import NumpyLSTM
+
+    if args.model:
+        model = load_model(args.model, compile=False)
+    else:
+        from lstm_model import MaintenanceLSTM
+        model = MaintenanceLSTM((24, 28)).model
+        # Give the BatchNorm layers non-trivial statistics so folding is exercised
+        for layer in model.layers:
+            if layer.__class__.__name__ == 'BatchNormalization':
+                gamma, beta, mean, variance = layer.get_weights()
+                rng = np.random.default_rng(1)
+                layer.set_weights([
+                    gamma * rng.uniform(0.5, 1.5, gamma.shape), rng.normal(0, 0.1, beta.shape),
+                    rng.normal(0, 0.5, mean.shape), variance * rng.uniform(0.5, 2, variance.shape)
+                ])
+    input_shape = model.input_shape[1:]
+
+    if args.store:
+        from sequence_store import SequenceStore
+        windows = SequenceStore(args.store).windows()
+        positions = np.random.default_rng(0).choice(
+            len(windows), min(args.windows, len(windows)), replace=False
+        )
+        X = np.asarray(windows.gather(positions)[0], dtype=np.float32)
+    else:
+        X = np.random.default_rng(0).normal(size=(args.windows,) + input_shape).astype(np.float32)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        h5_path = os.path.join(tmp, 'model.h5')
+        npz_path = os.path.join(tmp, 'model.npz')
+        model.save(h5_path)
+        export_numpy_model(model, npz_path)
+
+        report = {'max_abs_diff': check_parity(model, NumpyLSTM(npz_path), X, args.tolerance)}
+        for engine, path in (('keras', h5_path), ('numpy', npz_path)):
+            report[engine] = probe(path, input_shape)
+            stats = report[engine]
+            print(f"{engine:<6} startup {stats['startup_s']:6.2f}s  "
+                  f"p50 {stats['latency_ms_p50']:7.2f}ms  p99 {stats['latency_ms_p99']:7.2f}ms  "
+                  f"peak RSS {stats['peak_rss_mb']:7.1f}MB  "
+                  f"tensorflow {'loaded' if stats['tensorflow_loaded'] else 'not loaded'}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,24 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 from sqlalchemy import create_engine
 from datetime import timedelta
+import os
 import logging
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from rolling_features import add_rolling_features, group_boundaries
+from labeling import label_column, label_maintenance_horizons
+from time_join import asof_join
+from extraction import SOURCE_TABLES, read_table, table_snapshot
+from dataset_store import DATASET_DIR, write_processed_dataset, iter_processed_dataset
+from streaming_stats import StreamingCorrelation, ReservoirSample
+from artifact_cache import CACHE_DIR, ArtifactCache, code_version, link_tree, link_file
+import extraction
+import rolling_features
+import labeling
+import time_join
+import dataset_store
+import streaming_stats
 
 # Configure logging
 logging.basicConfig(
@@ -26,28 +43,63 @@ DB_PARAMS = {
     'port': '5432'
 }
 
-def load_data_from_db():
-    """Load data from PostgreSQL database with proper maintenance task handling"""
+# Feature configuration
+SENSOR_METRICS = ['temperature', 'vibration', 'pressure', 'humidity']
+ROLLING_WINDOWS = ['1H', '6H', '24H']
+LABEL_HORIZON = '24H'
+# Horizons labelled in the same pass, e.g. ['6H', '24H', '72H']. LABEL_HORIZON
+# becomes needs_maintenance, the others needs_maintenance_{horizon}.
+LABEL_HORIZONS = ['24H']
+# Environmental and usage readings are matched to sensor readings as-of
+# ('backward', 'forward' or 'nearest') within this tolerance
+JOIN_TOLERANCE = '1H'
+JOIN_DIRECTION = 'backward'
+
+HEATMAP_PATH = 'feature_correlations.png'
+
+def get_engine():
+    """SQLAlchemy engine for the monitoring database"""
+    return create_engine(
+        f'postgresql://{DB_PARAMS["user"]}:{DB_PARAMS["password"]}@'
+        f'{DB_PARAMS["host"]}:{DB_PARAMS["port"]}/{DB_PARAMS["dbname"]}'
+    )
+
+def load_data_from_db(watermarks=None, maintenance_since=None):
+    """Load data from PostgreSQL database with proper maintenance task handling
+
+    Tables are streamed in chunks through server-side cursors, reading only
+    the columns the pipeline uses with compact dtypes (see extraction.py).
+    When ``watermarks`` (machine_id -> timestamp) is given, only sensor,
+    environmental and usage rows newer than each machine's watermark are
+    read; machines without a watermark are read in full. When
+    ``maintenance_since`` is given, only maintenance logs after that date
+    are read.
+    """
     try:
-        engine = create_engine(
-            f'postgresql://{DB_PARAMS["user"]}:{DB_PARAMS["password"]}@'
-            f'{DB_PARAMS["host"]}:{DB_PARAMS["port"]}/{DB_PARAMS["dbname"]}'
-        )
+        engine = get_engine()
         
         logging.info("Loading data from database...")
         
-        tables = {
-            'sensor': 'sensor_data',
-            'machines': 'machines',
-            'maintenance_logs': 'maintenance_activity_logs',
-            'maintenance_tasks': 'maintenance_tasks',
-            'env': 'environmental_info',
-            'usage': 'machine_usage_history'
-        }
-        
         data = {}
-        for name, table in tables.items():
-            data[name] = pd.read_sql_table(table, engine)
+        for name, (table, _) in SOURCE_TABLES.items():
+            if watermarks is not None and name in ('sensor', 'env', 'usage'):
+                # Per-machine high-water marks: unknown machines have no mark
+                filter_sql = """
+                    LEFT JOIN unnest(CAST(:machine_ids AS integer[]),
+                                     CAST(:marks AS timestamp[])) AS w(machine_id, mark)
+                        ON t.machine_id = w.machine_id
+                    WHERE w.mark IS NULL OR t.timestamp > w.mark
+                """
+                params = {
+                    'machine_ids': [int(m) for m in watermarks],
+                    'marks': [pd.Timestamp(ts).to_pydatetime() for ts in watermarks.values()]
+                }
+                data[name] = read_table(engine, name, filter_sql, params)
+            elif maintenance_since is not None and name == 'maintenance_logs':
+                params = {'since': pd.Timestamp(maintenance_since).to_pydatetime()}
+                data[name] = read_table(engine, name, "WHERE t.date > :since", params)
+            else:
+                data[name] = read_table(engine, name)
             logging.info(f"Loaded {len(data[name])} rows from {table}")
             
         return (data['sensor'], data['machines'], 
@@ -93,7 +145,180 @@ def link_maintenance_to_machines(maintenance_logs, maintenance_tasks, machines):
         logging.error(f"Machine ID handling failed: {str(e)}")
         raise
 
-def create_training_dataframe():
+def safe_datetime_conversion(df, col):
+    """Convert a column to datetimes, dropping rows that fail to parse"""
+    df[col] = pd.to_datetime(df[col], errors='coerce')
+    null_count = df[col].isna().sum()
+    if null_count > 0:
+        logging.warning(f"Dropped {null_count} rows with invalid {col} dates")
+        df.dropna(subset=[col], inplace=True)
+    return df
+
+def prepare_sources(sensor, machines, maintenance_logs, maintenance_tasks, env, usage):
+    """Link maintenance to machines, parse timestamps and sort every source table"""
+    # Link maintenance data to machines
+    maintenance = link_maintenance_to_machines(maintenance_logs, maintenance_tasks, machines)
+    
+    # Convert timestamps with error handling
+    sensor = safe_datetime_conversion(sensor, 'timestamp')
+    maintenance = safe_datetime_conversion(maintenance, 'date')
+    env = safe_datetime_conversion(env, 'timestamp')
+    usage = safe_datetime_conversion(usage, 'timestamp')
+    machines['installation_date'] = pd.to_datetime(machines['installation_date'], errors='coerce')
+    
+    # Sort data
+    sensor.sort_values(['machine_id', 'timestamp'], inplace=True)
+    maintenance.sort_values(['machine_id', 'date'], inplace=True)
+    env.sort_values(['machine_id', 'timestamp'], inplace=True)
+    usage.sort_values(['machine_id', 'timestamp'], inplace=True)
+    
+    return sensor, machines, maintenance, env, usage
+
+def process_machine_frame(frame, maintenance_dates, metrics):
+    """Run the per-machine feature steps on one machine's merged rows
+
+    Sorts the rows by time, then adds maintenance recency, rolling features
+    and a target per label horizon. ``maintenance_dates`` holds the machine's
+    sorted maintenance dates.
+    """
+    frame = frame.sort_values('timestamp', kind='mergesort', ignore_index=True)
+    
+    # Calculate maintenance features next to the date they are derived from
+    days_since = (frame['timestamp'] - frame['last_maintenance_date']).dt.days.abs()
+    loc = frame.columns.get_loc('last_maintenance_date') + 1
+    frame.insert(loc, 'days_since_maintenance', days_since)
+    frame.insert(loc + 1, 'maintenance_urgency', 1 / (days_since.replace(0, 0.1) + 1e-6))
+    
+    # Create rolling features for all metrics and windows in one pass
+    try:
+        frame = add_rolling_features(frame, metrics, ROLLING_WINDOWS)
+    except Exception as e:
+        logging.error(f"Failed to create rolling features: {str(e)}")
+    
+    # Create target variables - maintenance needed within each label horizon
+    labels = label_maintenance_horizons(frame['timestamp'].to_numpy(), maintenance_dates,
+                                        LABEL_HORIZONS)
+    for horizon in LABEL_HORIZONS:
+        frame[label_column(horizon, LABEL_HORIZON)] = labels[horizon]
+    
+    # Cleanup
+    return frame.drop(columns=[
+        'last_maintenance_date', 
+        'error_code', 
+        'installation_date'
+    ], errors='ignore')
+
+# Inputs shared with forked workers, so shards are passed as row ranges
+# instead of pickled frames
+_SHARED = {}
+
+def _process_shard(shard):
+    """Process a contiguous block of machines from the shared merged frame"""
+    df = _SHARED['df']
+    empty = np.array([], dtype='datetime64[ns]')
+    frames = [
+        process_machine_frame(
+            df.iloc[lo:hi], _SHARED['maintenance'].get(machine_id, empty), _SHARED['metrics']
+        )
+        for machine_id, lo, hi in shard
+    ]
+    return pd.concat(frames, ignore_index=True)
+
+def run_machine_pipeline(df, maintenance, metrics, n_jobs=1):
+    """Run process_machine_frame for every machine, optionally across processes
+
+    ``df`` must hold each machine's rows contiguously. Machines are split into
+    contiguous shards; with ``n_jobs > 1`` the shards run in a forked process
+    pool that reads ``df`` copy-on-write. Shard results are combined in
+    machine order and then stably sorted by time, so the output does not
+    depend on ``n_jobs``.
+    """
+    keys = df['machine_id'].to_numpy()
+    starts, stops = group_boundaries(keys)
+    machines = [(keys[lo], lo, hi) for lo, hi in zip(starts, stops)]
+    n_shards = min(len(machines), max(1, n_jobs) * 4)
+    shards = [list(shard) for shard in np.array_split(np.arange(len(machines)), n_shards)]
+    shards = [[machines[i] for i in shard] for shard in shards]
+    
+    maintenance_dates = {
+        machine_id: group['date'].to_numpy(dtype='datetime64[ns]')
+        for machine_id, group in maintenance.sort_values('date').groupby('machine_id')
+    }
+    _SHARED.update(df=df, maintenance=maintenance_dates, metrics=metrics)
+    try:
+        if n_jobs > 1 and len(shards) > 1:
+            logging.info(f"Processing {len(machines)} machines in {len(shards)} shards "
+                         f"on {n_jobs} processes")
+            context = multiprocessing.get_context('fork')
+            with ProcessPoolExecutor(max_workers=n_jobs, mp_context=context) as executor:
+                results = list(executor.map(_process_shard, shards))
+        else:
+            results = [_process_shard(shard) for shard in shards]
+    finally:
+        _SHARED.clear()
+    
+    # Stable sort keeps ties in machine order so gap filling is deterministic
+    df = pd.concat(results, ignore_index=True)
+    return df.sort_values('timestamp', kind='mergesort', ignore_index=True)
+
+def build_feature_frame(sensor, machines, maintenance, env, usage, last_maintenance=None,
+                        n_jobs=1):
+    """Build features and the 24-hour target for prepared sources, before gap filling
+
+    ``last_maintenance`` maps machine_id to its latest maintenance date and
+    defaults to the latest date found in ``maintenance``. ``n_jobs`` sets the
+    number of processes used for the per-machine steps.
+    """
+    # Merge machine properties with sensor data
+    df = pd.merge(
+        sensor,
+        machines[['machine_id', 'machine_model_id', 'machine_type_id', 'installation_date']],
+        on='machine_id',
+        how='left' 
+    )
+    
+    # Add maintenance features
+    if last_maintenance is None:
+        last_maintenance = maintenance.groupby('machine_id')['date'].max()
+    df['last_maintenance_date'] = df['machine_id'].map(last_maintenance)
+    
+    # Fill missing maintenance dates with installation dates
+    df['last_maintenance_date'] = df['last_maintenance_date'].fillna(df['installation_date'])
+    
+    # Add environmental context and usage patterns from the closest earlier
+    # reading of the same machine, within JOIN_TOLERANCE
+    df = asof_join(
+        df,
+        [
+            (env, ['temperature_external', 'humidity']),
+            (usage, ['working_hours'])
+        ],
+        tolerance=JOIN_TOLERANCE,
+        direction=JOIN_DIRECTION
+    )
+    
+    # Create temporal features
+    df['hour'] = df['timestamp'].dt.hour
+    df['day_of_week'] = df['timestamp'].dt.dayofweek
+    df['month'] = df['timestamp'].dt.month
+    
+    # Create rolling features only for existing sensor metrics
+    existing_metrics = []
+    
+    # Check which sensor metrics actually exist
+    for metric in SENSOR_METRICS:
+        if metric in sensor.columns:
+            existing_metrics.append(metric)
+            logging.info(f"Creating rolling features for {metric}")
+        else:
+            logging.warning(f"Sensor metric not found: {metric}")
+    
+    # Sorting, recency, rolling features and labels are independent per machine
+    if not df['machine_id'].is_monotonic_increasing:
+        df = df.sort_values('machine_id', kind='mergesort', ignore_index=True)
+    return run_machine_pipeline(df, maintenance, existing_metrics, n_jobs)
+
+def create_training_dataframe(n_jobs=1):
     """Create processed dataframe for 24-hour maintenance prediction"""
     try:
         # Load data including maintenance_tasks
@@ -103,116 +328,10 @@ def create_training_dataframe():
         logging.info(f"Sensor columns: {sensor.columns.tolist()}")
         logging.info(f"Maintenance logs columns: {maintenance_logs.columns.tolist()}")
         
-        # Link maintenance data to machines
-        maintenance = link_maintenance_to_machines(maintenance_logs, maintenance_tasks, machines)
-        
-        # Convert timestamps with error handling
-        def safe_datetime_conversion(df, col):
-            df[col] = pd.to_datetime(df[col], errors='coerce')
-            null_count = df[col].isna().sum()
-            if null_count > 0:
-                logging.warning(f"Dropped {null_count} rows with invalid {col} dates")
-                df.dropna(subset=[col], inplace=True)
-            return df
-        
-        sensor = safe_datetime_conversion(sensor, 'timestamp')
-        maintenance = safe_datetime_conversion(maintenance, 'date')
-        env = safe_datetime_conversion(env, 'timestamp')
-        usage = safe_datetime_conversion(usage, 'timestamp')
-        machines['installation_date'] = pd.to_datetime(machines['installation_date'], errors='coerce')
-        
-        # Sort data
-        sensor.sort_values(['machine_id', 'timestamp'], inplace=True)
-        maintenance.sort_values(['machine_id', 'date'], inplace=True)
-        env.sort_values(['machine_id', 'timestamp'], inplace=True)
-        usage.sort_values(['machine_id', 'timestamp'], inplace=True)
-
-        # Merge machine properties with sensor data
-        df = pd.merge(
-            sensor,
-            machines[['machine_id', 'machine_model_id', 'machine_type_id', 'installation_date']],
-            on='machine_id',
-            how='left' 
-        )
-        
-        # Add maintenance features
-        last_maintenance = maintenance.groupby('machine_id')['date'].max().reset_index()
-        last_maintenance.columns = ['machine_id', 'last_maintenance_date']
-        df = pd.merge(df, last_maintenance, on='machine_id', how='left')
-        
-        # Fill missing maintenance dates with installation dates
-        df['last_maintenance_date'] = df['last_maintenance_date'].fillna(df['installation_date'])
-        
-        # Calculate maintenance features
-        df['days_since_maintenance'] = (df['timestamp'] - df['last_maintenance_date']).dt.days.abs()
-        df['maintenance_urgency'] = 1 / (df['days_since_maintenance'].replace(0, 0.1) + 1e-6)
-        
-        # Add environmental context
-        df = pd.merge(
-            df,
-            env[['machine_id', 'timestamp', 'temperature_external', 'humidity']],
-            on=['machine_id', 'timestamp'],
-            how='left'
+        sensor, machines, maintenance, env, usage = prepare_sources(
+            sensor, machines, maintenance_logs, maintenance_tasks, env, usage
         )
-        
-        # Add usage patterns
-        df = pd.merge(
-            df,
-            usage[['machine_id', 'timestamp', 'working_hours']],
-            on=['machine_id', 'timestamp'],
-            how='left'
-        )
-        
-        # Create temporal features
-        df['hour'] = df['timestamp'].dt.hour
-        df['day_of_week'] = df['timestamp'].dt.dayofweek
-        df['month'] = df['timestamp'].dt.month
-        
-        # Create rolling features only for existing sensor metrics
-        window_sizes = ['1H', '6H', '24H']
-        existing_metrics = []
-        
-        # Check which sensor metrics actually exist
-        for metric in ['temperature', 'vibration', 'pressure', 'humidity']:
-            if metric in sensor.columns:
-                existing_metrics.append(metric)
-                logging.info(f"Creating rolling features for {metric}")
-            else:
-                logging.warning(f"Sensor metric not found: {metric}")
-        
-        # Create rolling features
-        for col in existing_metrics:
-            for window in window_sizes:
-                try:
-                    df[f'{col}_rolling_mean_{window}'] = df.groupby('machine_id', group_keys=False)\
-                        .apply(lambda g: g.rolling(window, on='timestamp', min_periods=1)[col].mean())
-                    df[f'{col}_rolling_max_{window}'] = df.groupby('machine_id', group_keys=False)\
-                        .apply(lambda g: g.rolling(window, on='timestamp', min_periods=1)[col].max())
-                except Exception as e:
-                    logging.error(f"Failed to create rolling features for {col}: {str(e)}")
-                    continue
-        
-        # Create target variable - maintenance needed in next 24 hours
-        maintenance['is_maintenance'] = 1
-        df = pd.merge_asof(
-            df.sort_values('timestamp'),
-            maintenance[['machine_id', 'date', 'is_maintenance']].sort_values('date'),
-            left_on='timestamp',
-            right_on='date',
-            by='machine_id',
-            direction='forward',
-            tolerance=pd.Timedelta('24H')
-        )
-        df['needs_maintenance'] = df['is_maintenance'].fillna(0).astype(int)
-        
-        # Cleanup
-        df = df.drop(columns=[
-            'last_maintenance_date', 
-            'error_code', 
-            'installation_date', 
-            'date', 
-            'is_maintenance'
-        ])
+        df = build_feature_frame(sensor, machines, maintenance, env, usage, n_jobs=n_jobs)
         
         # Forward fill and drop remaining NAs
         df = df.ffill().dropna()
@@ -226,11 +345,48 @@ def create_training_dataframe():
         logging.error(f"Data processing failed: {str(e)}")
         raise
 
-def generate_heatmap(df):
-    """Generate and save correlation heatmap"""
+def dataset_cache_key(preview_rows=None):
+    """Cache key of a full build: source snapshot, feature config and pipeline code"""
+    return ArtifactCache.key(
+        'dataset',
+        snapshot=table_snapshot(get_engine()),
+        config={
+            'metrics': SENSOR_METRICS,
+            'rolling_windows': ROLLING_WINDOWS,
+            'label_horizon': LABEL_HORIZON,
+            'label_horizons': LABEL_HORIZONS,
+            'join_tolerance': JOIN_TOLERANCE,
+            'join_direction': JOIN_DIRECTION,
+            'heatmap_preview': preview_rows
+        },
+        code=code_version(__file__, extraction, rolling_features, labeling, time_join,
+                          dataset_store, streaming_stats)
+    )
+
+def generate_heatmap(data, preview_rows=None):
+    """Generate and save correlation heatmap
+
+    ``data`` is a DataFrame or an iterable of DataFrame chunks, e.g. from
+    iter_processed_dataset. The correlations are accumulated in one pass so
+    the full dataset never has to fit in memory. With ``preview_rows`` the
+    matrix is computed from a uniform reservoir sample of that many rows.
+    """
     try:
+        chunks = [data] if isinstance(data, pd.DataFrame) else data
+        if preview_rows:
+            reservoir = ReservoirSample(preview_rows)
+            for chunk in chunks:
+                reservoir.update(chunk)
+            corr = reservoir.sample.select_dtypes(include=np.number).corr()
+            logging.info(f"Correlation preview from {len(reservoir.sample)} of {reservoir.seen} rows")
+        else:
+            stats = StreamingCorrelation()
+            for chunk in chunks:
+                stats.update(chunk)
+            corr = stats.corr()
+            logging.info(f"Correlations computed over {stats.count} rows")
+        
         plt.figure(figsize=(20, 18))
-        corr = df.select_dtypes(include=np.number).corr()
         
         # Create mask for upper triangle
         mask = np.triu(np.ones_like(corr, dtype=bool))
@@ -250,32 +406,67 @@ def generate_heatmap(df):
         plt.xticks(rotation=45, ha='right', fontsize=8)
         plt.yticks(fontsize=8)
         plt.tight_layout()
-        plt.savefig('feature_correlations.png', dpi=300, bbox_inches='tight')
+        # Replace rather than overwrite: the file may be linked into the artifact cache
+        tmp_path = f"{HEATMAP_PATH}.tmp.png"
+        plt.savefig(tmp_path, dpi=300, bbox_inches='tight')
         plt.close()
-        logging.info("Saved correlation heatmap to feature_correlations.png")
+        os.replace(tmp_path, HEATMAP_PATH)
+        logging.info(f"Saved correlation heatmap to {HEATMAP_PATH}")
         
     except Exception as e:
         logging.error(f"Heatmap generation failed: {str(e)}")
         raise
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Build the 24-hour maintenance prediction dataset')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='Processes used for per-machine feature engineering')
+    parser.add_argument('--heatmap-preview', type=int, default=None, metavar='ROWS',
+                        help='Build the correlation heatmap from a sample of ROWS rows')
+    parser.add_argument('--heatmap-only', action='store_true',
+                        help='Only rebuild the heatmap from the stored processed dataset')
+    parser.add_argument('--cache-dir', default=CACHE_DIR,
+                        help='Artifact cache; a build whose inputs are unchanged is reused')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Always rebuild, and do not store the result in the cache')
+    args = parser.parse_args()
+    
     try:
-        logging.info("Starting 24-hour maintenance prediction data processing pipeline")
-        processed_df = create_training_dataframe()
-        
-        # Generate and save visualizations
-        generate_heatmap(processed_df)
-        
-        # Save processed data
-        processed_df.to_csv('processed_maintenance_prediction_data.csv', index=False)
-        logging.info("Successfully saved processed data to processed_maintenance_prediction_data.csv")
-        
-        # Print sample data
-        print("\nSample processed data (24H maintenance prediction):")
-        print(processed_df[
-            ['machine_id', 'timestamp', 'temperature', 'vibration', 
-             'days_since_maintenance', 'needs_maintenance']
-        ].head())
+        cache = None if args.no_cache or args.heatmap_only else ArtifactCache(args.cache_dir)
+        key = dataset_cache_key(args.heatmap_preview) if cache else None
+        cached = cache.get(key) if cache else None
+        
+        if args.heatmap_only:
+            # Rebuild the heatmap from the stored dataset, chunk by chunk
+            generate_heatmap(iter_processed_dataset(DATASET_DIR), preview_rows=args.heatmap_preview)
+        elif cached:
+            # Same sources, feature config and code as a cached build: reuse it
+            link_tree(os.path.join(cached, 'dataset'), DATASET_DIR)
+            link_file(os.path.join(cached, HEATMAP_PATH), HEATMAP_PATH)
+            logging.info(f"Restored {DATASET_DIR} and {HEATMAP_PATH} from {cached}")
+        else:
+            logging.info("Starting 24-hour maintenance prediction data processing pipeline")
+            processed_df = create_training_dataframe(n_jobs=args.jobs)
+            
+            # Save processed data
+            write_processed_dataset(processed_df, DATASET_DIR)
+            logging.info(f"Successfully saved processed data to {DATASET_DIR}")
+            
+            # Generate and save visualizations from the stored dataset, chunk by chunk
+            generate_heatmap(iter_processed_dataset(DATASET_DIR), preview_rows=args.heatmap_preview)
+            
+            if cache:
+                def build_entry(entry):
+                    link_tree(DATASET_DIR, os.path.join(entry, 'dataset'))
+                    link_file(HEATMAP_PATH, os.path.join(entry, HEATMAP_PATH))
+                cache.put(key, build_entry)
+            
+            # Print sample data
+            print("\nSample processed data (24H maintenance prediction):")
+            print(processed_df[
+                ['machine_id', 'timestamp', 'temperature', 'vibration', 
+                 'days_since_maintenance', 'needs_maintenance']
+            ].head())
         
     except Exception as e:
         logging.error(f"Main pipeline execution failed: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,245 @@
+# dataset_store.py
+import os
+import shutil
+import uuid
+import logging
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+DATASET_DIR = 'processed_maintenance_prediction_data'
+SCHEMA_FILE = '_common_metadata'
+# Batches written but not yet committed; dataset discovery skips '_' paths
+STAGING_DIR = '_staging'
+# Names one build of the dataset; incremental state only appends to the build it made
+DATASET_ID_FILE = '_dataset_id'
+
+# Hive-style partitions: one directory per machine, one sub-directory per month
+PARTITIONING = ds.partitioning(
+    pa.schema([('machine_id', pa.int32()), ('period', pa.string())]),
+    flavor='hive'
+)
+
+# Storage dtypes for integer-valued columns; every other numeric column is float32
+INTEGER_COLUMNS = {
+    'machine_id': 'int32',
+    'sensor_id': 'int64',
+    'machine_model_id': 'int32',
+    'machine_type_id': 'int32',
+    'hour': 'int8',
+    'day_of_week': 'int8',
+    'month': 'int8'
+}
+
+
+def to_storage_dtypes(df):
+    """Cast a processed frame to the typed schema used on disk"""
+    df = df.copy()
+    for col in df.columns:
+        if col in INTEGER_COLUMNS:
+            df[col] = df[col].astype(INTEGER_COLUMNS[col])
+        elif col.startswith('needs_maintenance'):
+            df[col] = df[col].astype('int8')
+        elif col == 'timestamp':
+            df[col] = pd.to_datetime(df[col]).astype('datetime64[ns]')
+        elif pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = df[col].astype('float32')
+    return df
+
+
+def open_dataset(root=DATASET_DIR):
+    """Open the partitioned dataset with its stored schema"""
+    schema = pq.read_schema(os.path.join(root, SCHEMA_FILE))
+    return schema, ds.dataset(root, format='parquet', schema=schema, partitioning=PARTITIONING)
+
+
+def dataset_columns(root=DATASET_DIR):
+    """Data columns of the processed dataset, in the order they were written"""
+    schema = pq.read_schema(os.path.join(root, SCHEMA_FILE))
+    return [name for name in schema.names if name != 'period']
+
+
+def new_dataset_id(root=DATASET_DIR):
+    """Give the dataset at root a new build id and return it"""
+    os.makedirs(root, exist_ok=True)
+    build_id = uuid.uuid4().hex
+    tmp_path = os.path.join(root, f"{DATASET_ID_FILE}.tmp")
+    with open(tmp_path, 'w') as f:
+        f.write(build_id)
+    os.replace(tmp_path, os.path.join(root, DATASET_ID_FILE))
+    return build_id
+
+
+def dataset_id(root=DATASET_DIR):
+    """Build id of the dataset at root, None if it has none"""
+    path = os.path.join(root, DATASET_ID_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return f.read().strip()
+
+
+def write_processed_dataset(df, root=DATASET_DIR):
+    """Write processed rows as Parquet partitioned by machine_id and month
+
+    A full write replaces the dataset under a new build id; incremental runs
+    add to it with ``stage_processed_dataset`` and ``commit_staged_dataset``.
+    """
+    try:
+        df = to_storage_dtypes(df)
+        df['period'] = df['timestamp'].dt.strftime('%Y-%m')
+        table = pa.Table.from_pandas(df, preserve_index=False)
+
+        if os.path.exists(root):
+            shutil.rmtree(root)
+        new_dataset_id(root)
+        pq.write_metadata(table.schema, os.path.join(root, SCHEMA_FILE))
+
+        ds.write_dataset(
+            table,
+            root,
+            format='parquet',
+            partitioning=PARTITIONING,
+            basename_template=f'part-{uuid.uuid4().hex}-{{i}}.parquet',
+            existing_data_behavior='overwrite_or_ignore'
+        )
+        logging.info(f"Wrote {len(df)} rows to {root}")
+
+    except Exception as e:
+        logging.error(f"Error writing processed dataset: {str(e)}")
+        raise
+
+
+def stage_processed_dataset(df, root, batch_id):
+    """Write rows under the dataset's staging directory, invisible to readers
+
+    The files keep the dataset's partition layout and schema, so
+    ``commit_staged_dataset`` only has to move them into place.
+    """
+    try:
+        staging = os.path.join(root, STAGING_DIR, batch_id)
+        if os.path.exists(staging):
+            shutil.rmtree(staging)
+        df = to_storage_dtypes(df)
+        df['period'] = df['timestamp'].dt.strftime('%Y-%m')
+        table = pa.Table.from_pandas(df, preserve_index=False)
+
+        schema_path = os.path.join(root, SCHEMA_FILE)
+        if os.path.exists(schema_path):
+            schema = pq.read_schema(schema_path)
+            table = table.select(schema.names).cast(schema)
+        else:
+            os.makedirs(root, exist_ok=True)
+            pq.write_metadata(table.schema, schema_path)
+
+        ds.write_dataset(
+            table,
+            staging,
+            format='parquet',
+            partitioning=PARTITIONING,
+            basename_template=f'part-{batch_id}-{{i}}.parquet',
+            existing_data_behavior='overwrite_or_ignore'
+        )
+        logging.info(f"Staged {len(df)} rows as batch {batch_id}")
+
+    except Exception as e:
+        logging.error(f"Error staging processed rows: {str(e)}")
+        raise
+
+
+def commit_staged_dataset(root, batch_id):
+    """Move a staged batch into the dataset; repeating it after a crash is safe"""
+    staging = os.path.join(root, STAGING_DIR, batch_id)
+    if not os.path.exists(staging):
+        return
+    for directory, _, names in os.walk(staging):
+        for name in names:
+            source = os.path.join(directory, name)
+            target = os.path.join(root, os.path.relpath(source, staging))
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(source, target)
+    shutil.rmtree(staging)
+    logging.info(f"Committed batch {batch_id} to {root}")
+
+
+def discard_staged_dataset(root):
+    """Drop staged batches that were never committed"""
+    staging = os.path.join(root, STAGING_DIR)
+    if os.path.exists(staging):
+        logging.info(f"Discarding uncommitted batches {sorted(os.listdir(staging))}")
+        shutil.rmtree(staging)
+
+
+def read_processed_dataset(root=DATASET_DIR, columns=None, machine_ids=None,
+                           start=None, end=None):
+    """Read the processed dataset, touching only the partitions and columns needed
+
+    Rows come back ordered by machine and time, with columns in the order
+    they were written. ``start``/``end`` bound the timestamp (inclusive).
+    """
+    try:
+        schema, dataset = open_dataset(root)
+
+        filters = []
+        if machine_ids is not None:
+            filters.append(ds.field('machine_id').isin([int(m) for m in machine_ids]))
+        if start is not None:
+            start = pd.Timestamp(start)
+            filters.append(ds.field('period') >= start.strftime('%Y-%m'))
+            filters.append(ds.field('timestamp') >= start.to_pydatetime())
+        if end is not None:
+            end = pd.Timestamp(end)
+            filters.append(ds.field('period') <= end.strftime('%Y-%m'))
+            filters.append(ds.field('timestamp') <= end.to_pydatetime())
+        expression = None
+        for f in filters:
+            expression = f if expression is None else expression & f
+
+        if columns is None:
+            columns = [name for name in schema.names if name != 'period']
+        df = dataset.to_table(columns=columns, filter=expression).to_pandas()
+
+        if {'machine_id', 'timestamp'}.issubset(df.columns):
+            df = df.sort_values(['machine_id', 'timestamp'], kind='mergesort', ignore_index=True)
+        logging.info(f"Read {len(df)} rows x {len(df.columns)} columns from {root}")
+        return df
+
+    except Exception as e:
+        logging.error(f"Error reading processed dataset: {str(e)}")
+        raise
+
+
+def iter_processed_dataset(root=DATASET_DIR, columns=None, batch_size=100000):
+    """Stream the processed dataset as DataFrame chunks without loading it whole"""
+    schema, dataset = open_dataset(root)
+    if columns is None:
+        columns = [name for name in schema.names if name != 'period']
+    for batch in dataset.to_batches(columns=columns, batch_size=batch_size):
+        if batch.num_rows:
+            yield batch.to_pandas()
+
+
+def machine_row_counts(root=DATASET_DIR):
+    """Rows per machine, read from the Parquet footers without scanning any data"""
+    _, dataset = open_dataset(root)
+    counts = {}
+    for fragment in dataset.get_fragments():
+        machine_id = ds.get_partition_keys(fragment.partition_expression)['machine_id']
+        counts[machine_id] = counts.get(machine_id, 0) + fragment.count_rows()
+    return dict(sorted(counts.items()))
+
+
+def iter_machine_frames(root=DATASET_DIR, columns=None, machine_ids=None):
+    """Yield (machine_id, rows in time order) one machine partition at a time"""
+    schema, dataset = open_dataset(root)
+    if columns is None:
+        columns = [name for name in schema.names if name != 'period']
+    if machine_ids is None:
+        machine_ids = list(machine_row_counts(root))
+    for machine_id in machine_ids:
+        table = dataset.to_table(columns=columns, filter=ds.field('machine_id') == int(machine_id))
+        df = table.to_pandas()
+        if 'timestamp' in df.columns:
+            df = df.sort_values('timestamp', kind='mergesort', ignore_index=True)
+        yield machine_id, df
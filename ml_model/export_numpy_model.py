@@ -0,0 +1,119 @@
+# export_numpy_model.py
+import json
+import logging
+import argparse
+import numpy as np
+
+NUMPY_MODEL_FORMAT = 1
+WEIGHT_TYPES = ('float32', 'float16', 'int8')
+
+
+def batchnorm_affine(layer):
+    """Inference-time BatchNormalization as a per-feature scale and shift"""
+    gamma, beta, mean, variance = layer.get_weights()
+    scale = gamma / np.sqrt(variance + layer.epsilon)
+    return scale, beta - mean * scale
+
+
+def fold_affine(kernel, bias, scale, shift):
+    """Fold y = x * scale + shift into the layer that consumes y
+
+    ``(x * scale + shift) @ W + b == x @ (scale[:, None] * W) + (shift @ W + b)``
+    """
+    return kernel * scale[:, None], bias + shift @ kernel
+
+
+def quantize_int8(matrix):
+    """Symmetric per-output-column int8 quantization, returns (values, scales)"""
+    scale = np.abs(matrix).max(axis=0) / 127.0
+    scale[scale == 0] = 1.0
+    values = np.clip(np.round(matrix / scale), -127, 127).astype(np.int8)
+    return values, scale.astype(np.float32)
+
+
+def quantize_weights(arrays, weights):
+    """Store kernels in the requested type; biases are tiny and stay float32"""
+    if weights not in WEIGHT_TYPES:
+        raise ValueError(f"Unknown weight type {weights}, expected one of {WEIGHT_TYPES}")
+    quantized = {}
+    for key, value in arrays.items():
+        value = value.astype(np.float32)
+        if key.endswith('_bias') or weights == 'float32':
+            quantized[key] = value
+        elif weights == 'float16':
+            quantized[key] = value.astype(np.float16)
+        else:
+            quantized[key], quantized[f'{key}_scale'] = quantize_int8(value)
+    return quantized
+
+
+def export_numpy_model(model, path, weights='float32'):
+    """Write a Keras LSTM/Dense stack as plain arrays for the NumPy inference engine
+
+    Dropout is dropped (it is the identity at inference) and every
+    BatchNormalization is folded into the input weights of the next LSTM or
+    Dense layer, so the artifact is only matmuls and activations. Gate order
+    and activations follow Keras: i, f, c, o with sigmoid/tanh. ``weights``
+    set to 'float16' or 'int8' stores the kernels at reduced precision,
+    folding happens first so the quantization sees the final weights.
+    """
+    from tensorflow.keras.layers import LSTM, Dense, Dropout, BatchNormalization
+    arrays = {}
+    layers = []
+    pending = None  # BatchNorm scale/shift waiting for the next weighted layer
+
+    for layer in model.layers:
+        if isinstance(layer, Dropout):
+            continue
+        if isinstance(layer, BatchNormalization):
+            scale, shift = batchnorm_affine(layer)
+            if pending is not None:
+                scale, shift = pending[0] * scale, pending[1] * scale + shift
+            pending = (scale, shift)
+            continue
+
+        name = f"layer{len(layers)}"
+        if isinstance(layer, LSTM):
+            kernel, recurrent, bias = layer.get_weights()
+            if pending is not None:
+                kernel, bias = fold_affine(kernel, bias, *pending)
+            arrays.update({f'{name}_kernel': kernel, f'{name}_recurrent': recurrent,
+                           f'{name}_bias': bias})
+            layers.append({'name': name, 'type': 'lstm', 'units': layer.units,
+                           'return_sequences': layer.return_sequences})
+        elif isinstance(layer, Dense):
+            kernel, bias = layer.get_weights()
+            if pending is not None:
+                kernel, bias = fold_affine(kernel, bias, *pending)
+            arrays.update({f'{name}_kernel': kernel, f'{name}_bias': bias})
+            layers.append({'name': name, 'type': 'dense', 'units': layer.units,
+                           'activation': layer.get_config()['activation']})
+        else:
+            raise ValueError(f"Cannot export layer {layer.name} ({type(layer).__name__})")
+        pending = None
+
+    if pending is not None:
+        raise ValueError("Model ends in BatchNormalization, nothing to fold it into")
+
+    spec = {
+        'format': NUMPY_MODEL_FORMAT,
+        'input_shape': list(model.input_shape[1:]),
+        'weights': weights,
+        'layers': layers
+    }
+    arrays = quantize_weights(arrays, weights)
+    np.savez(path, spec=np.array(json.dumps(spec)), **arrays)
+    logging.info(f"Exported {len(layers)} layers to {path} with {weights} weights")
+    return spec
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description='Export a trained model for NumPy inference')
+    parser.add_argument('--model', default='model/lstm_maintenance_final.h5')
+    parser.add_argument('--output', default='model/lstm_maintenance_final.npz')
+    parser.add_argument('--weights', choices=WEIGHT_TYPES, default='float32',
+                        help='Precision the weights are stored at')
+    args = parser.parse_args()
+    from tensorflow.keras.models import load_model
+    export_numpy_model(load_model(args.model, compile=False), args.output, args.weights)
@@ -0,0 +1,148 @@
+# extraction.py
+import logging
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+CHUNK_SIZE = 100000
+
+# Columns the feature pipeline reads from each table, with the compact dtype
+# applied while streaming. sensor_id is kept because it is one of the model's
+# input features; error_code is dropped by the pipeline and never read.
+SOURCE_TABLES = {
+    'sensor': ('sensor_data', {
+        'sensor_id': 'int64',
+        'machine_id': 'int32',
+        'timestamp': 'datetime64[ns]',
+        'temperature': 'float32',
+        'vibration': 'float32',
+        'load': 'float32',
+        'cycle_time': 'float32',
+        'power_consumption': 'float32'
+    }),
+    'machines': ('machines', {
+        'machine_id': 'int32',
+        'machine_model_id': 'int32',
+        'machine_type_id': 'int32',
+        'installation_date': 'datetime64[ns]'
+    }),
+    'maintenance_logs': ('maintenance_activity_logs', {
+        'maintenance_task_id': 'int32',
+        'date': 'datetime64[ns]'
+    }),
+    'maintenance_tasks': ('maintenance_tasks', {
+        'maintenance_task_id': 'int32',
+        'machine_id': 'int32'
+    }),
+    'env': ('environmental_info', {
+        'machine_id': 'int32',
+        'timestamp': 'datetime64[ns]',
+        'temperature_external': 'float32',
+        'humidity': 'float32'
+    }),
+    'usage': ('machine_usage_history', {
+        'machine_id': 'int32',
+        'timestamp': 'datetime64[ns]',
+        'working_hours': 'float32'
+    })
+}
+
+# Column whose maximum, with the row count, identifies a table's contents for
+# the artifact cache. The tables are append-only, so new data changes one or
+# the other; rows edited in place are not detected.
+SNAPSHOT_COLUMNS = {
+    'sensor': 'timestamp',
+    'machines': 'installation_date',
+    'maintenance_logs': 'date',
+    'maintenance_tasks': 'maintenance_task_id',
+    'env': 'timestamp',
+    'usage': 'timestamp'
+}
+
+
+def apply_schema(chunk, schema):
+    """Cast a chunk to the compact schema
+
+    Integer columns that contain NULLs use the nullable ``Int32``/``Int64``
+    dtype, which keeps ids exact where float32 would round them above 2**24.
+    Text columns can be declared as ``category``.
+    """
+    for col, dtype in schema.items():
+        if dtype.startswith('datetime64'):
+            chunk[col] = pd.to_datetime(chunk[col], errors='coerce')
+        elif dtype.startswith('int') and chunk[col].isna().any():
+            chunk[col] = pd.to_numeric(chunk[col], errors='coerce').astype(dtype.capitalize())
+        elif dtype.startswith(('int', 'float')):
+            chunk[col] = pd.to_numeric(chunk[col], errors='coerce').astype(dtype)
+        else:
+            chunk[col] = chunk[col].astype(dtype)
+    return chunk
+
+
+def iter_table_chunks(engine, table, schema, filter_sql='', params=None, chunksize=CHUNK_SIZE):
+    """Stream a table through a server-side cursor, one typed chunk at a time
+
+    Only the schema's columns are selected. ``filter_sql`` is appended after
+    ``FROM {table} t`` and may reference the table as ``t``.
+    """
+    columns = ', '.join(f't.{col}' for col in schema)
+    query = text(f"SELECT {columns} FROM {table} t {filter_sql}")
+
+    # stream_results makes psycopg2 use a named (server-side) cursor, so only
+    # one chunk of raw rows is ever held on the client
+    with engine.connect().execution_options(stream_results=True, max_row_buffer=chunksize) as conn:
+        for chunk in pd.read_sql_query(query, conn, params=params, chunksize=chunksize):
+            yield apply_schema(chunk, schema)
+
+
+def read_table(engine, name, filter_sql='', params=None, chunksize=CHUNK_SIZE):
+    """Read one source table into a compact DataFrame by streaming it in chunks
+
+    Each chunk is split into per-column arrays as it arrives and the chunk
+    is dropped; at the end every column is concatenated once and its parts
+    released before the next, so peak memory is the table plus one column
+    rather than every chunk plus their concatenation.
+    """
+    table, schema = SOURCE_TABLES[name]
+    parts = {col: [] for col in schema}
+    # NULL positions of integer columns, which numpy integers cannot hold
+    null_parts = {col: [] for col, dtype in schema.items() if dtype.startswith('int')}
+    for chunk in iter_table_chunks(engine, table, schema, filter_sql, params, chunksize):
+        for col, dtype in schema.items():
+            if col in null_parts:
+                null_parts[col].append(chunk[col].isna().to_numpy())
+                parts[col].append(chunk[col].to_numpy(dtype=dtype, na_value=0))
+            else:
+                parts[col].append(chunk[col].to_numpy())
+        del chunk
+
+    if not parts[next(iter(schema))]:
+        return apply_schema(pd.DataFrame(columns=list(schema)), schema)
+
+    columns = {}
+    for col, dtype in schema.items():
+        array = np.concatenate(parts.pop(col))
+        nulls = np.concatenate(null_parts.pop(col)) if col in null_parts else None
+        if nulls is not None and nulls.any():
+            columns[col] = pd.arrays.IntegerArray(array, nulls)
+        elif dtype == 'category':
+            columns[col] = pd.Categorical(array)
+        else:
+            columns[col] = array
+    df = pd.DataFrame(columns, copy=False)
+    logging.info(f"Streamed {len(df)} rows from {table} "
+                 f"({df.memory_usage(deep=True).sum() / 1e6:.1f} MB)")
+    return df
+
+
+def table_snapshot(engine):
+    """Row count and newest key of every source table, as one cheap query per table"""
+    snapshot = {}
+    with engine.connect() as conn:
+        for name, (table, _) in SOURCE_TABLES.items():
+            column = SNAPSHOT_COLUMNS[name]
+            count, newest = conn.execute(
+                text(f"SELECT COUNT(*), MAX({column}) FROM {table}")
+            ).one()
+            snapshot[name] = [int(count), str(newest)]
+    return snapshot
@@ -0,0 +1,197 @@
+# incremental_processing.py
+import os
+import uuid
+import pickle
+import shutil
+import logging
+import pandas as pd
+from data_processing import (
+    load_data_from_db,
+    prepare_sources,
+    build_feature_frame,
+    ROLLING_WINDOWS,
+    LABEL_HORIZONS,
+    JOIN_TOLERANCE
+)
+from dataset_store import (
+    DATASET_DIR,
+    stage_processed_dataset,
+    commit_staged_dataset,
+    discard_staged_dataset,
+    new_dataset_id,
+    dataset_id
+)
+
+STATE_PATH = 'processed_state.pkl'
+
+
+class FeatureState:
+    """Carry-over state between incremental runs of the feature pipeline
+
+    Rows are only written once their longest label window has closed, so two
+    high-water marks are kept per machine: ``processed_until`` (newest sensor
+    reading read from the database) and ``emitted_until`` (newest row written
+    to the processed dataset). ``tails`` holds the raw source rows needed to
+    recompute rolling windows and labels for the rows still pending.
+    ``pending_batch`` names rows staged in the dataset that this state
+    already accounts for but that may not have been moved into place yet.
+    ``dataset_id`` is the build of the dataset the state describes.
+    """
+
+    def __init__(self):
+        self.processed_until = {}
+        self.emitted_until = {}
+        self.last_maintenance = {}
+        self.ffill_values = {}
+        self.tails = {}
+        self.pending_batch = None
+        self.dataset_id = None
+
+    @classmethod
+    def load(cls, path=STATE_PATH):
+        """Load state from disk, or start empty for a first (full) run"""
+        if not os.path.exists(path):
+            logging.info(f"No feature state at {path}, starting a full build")
+            return cls()
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    def save(self, path=STATE_PATH):
+        """Atomically persist the state next to the processed dataset"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(self, f)
+        os.replace(tmp_path, path)
+
+    def maintenance_since(self):
+        """Earliest maintenance date that can still change a pending label"""
+        if not self.emitted_until:
+            return None
+        return min(self.emitted_until.values())
+
+    def combine(self, name, new_rows):
+        """Prepend the carried-over tail of a source table to its new rows"""
+        tail = self.tails.get(name)
+        if tail is None or tail.empty:
+            return new_rows
+        combined = pd.concat([tail, new_rows], ignore_index=True)
+        return combined.sort_values(['machine_id', 'timestamp'], kind='mergesort', ignore_index=True)
+
+    def keep_tail(self, name, rows, lookback):
+        """Keep the rows a machine still needs as context for its pending rows"""
+        emitted = pd.to_datetime(rows['machine_id'].map(self.emitted_until))
+        keep = emitted.isna() | (rows['timestamp'] > emitted - lookback)
+        self.tails[name] = rows[keep].reset_index(drop=True)
+
+
+def update_training_dataframe(state_path=STATE_PATH, output_path=DATASET_DIR, n_jobs=1):
+    """Process only rows newer than each machine's watermark and append them
+
+    Returns the newly appended rows. Running against an empty state builds
+    the dataset from scratch, replacing any existing one, and holds back the
+    longest label horizon of every machine until the following run.
+
+    New rows are staged first, then the state is saved with the staged
+    batch, and only then are the rows moved into the dataset. The state save
+    is the commit point: a crash before it leaves rows that are discarded and
+    recomputed, and a crash after it leaves a batch the next run finishes.
+    """
+    try:
+        state = FeatureState.load(state_path)
+        if state.processed_until and getattr(state, 'dataset_id', None) != dataset_id(output_path):
+            # A full build or cache restore replaced the dataset since the last run
+            logging.info(f"{output_path} is not the dataset the feature state describes, "
+                         f"starting over")
+            state = FeatureState()
+        pending_batch = getattr(state, 'pending_batch', None)
+        if pending_batch:
+            commit_staged_dataset(output_path, pending_batch)
+            state.pending_batch = None
+            state.save(state_path)
+        discard_staged_dataset(output_path)
+
+        if not state.processed_until:
+            if os.path.exists(output_path):
+                # Without state nothing says which rows are in the dataset already
+                logging.info(f"No feature state for the dataset at {output_path}, rebuilding it")
+                shutil.rmtree(output_path)
+            state.dataset_id = new_dataset_id(output_path)
+
+        horizon = max(pd.Timedelta(h) for h in LABEL_HORIZONS)
+        lookback = max(
+            [pd.Timedelta(window) for window in ROLLING_WINDOWS] + [pd.Timedelta(JOIN_TOLERANCE)]
+        )
+
+        sensor, machines, maintenance_logs, maintenance_tasks, env, usage = load_data_from_db(
+            watermarks=state.processed_until,
+            maintenance_since=state.maintenance_since()
+        )
+        sensor, machines, maintenance, env, usage = prepare_sources(
+            sensor, machines, maintenance_logs, maintenance_tasks, env, usage
+        )
+
+        if sensor.empty:
+            logging.info("No new sensor data since the last run")
+            return pd.DataFrame()
+        logging.info(f"Processing {len(sensor)} new sensor rows for "
+                     f"{sensor['machine_id'].nunique()} machines")
+
+        # Prepend the carried-over tails so windows and labels see their context
+        sensor = state.combine('sensor', sensor)
+        env = state.combine('env', env)
+        usage = state.combine('usage', usage)
+
+        last_maintenance = pd.Series(state.last_maintenance, dtype='datetime64[ns]')
+        new_maintenance = maintenance.groupby('machine_id')['date'].max()
+        last_maintenance = pd.concat([last_maintenance, new_maintenance]).groupby(level=0).max()
+
+        df = build_feature_frame(sensor, machines, maintenance, env, usage, last_maintenance,
+                                 n_jobs=n_jobs)
+
+        # Emit rows whose label window has closed and that were not written before
+        processed_until = sensor.groupby('machine_id')['timestamp'].max()
+        cutoff = df['machine_id'].map(processed_until - horizon)
+        emitted_until = pd.to_datetime(df['machine_id'].map(state.emitted_until))
+        ready = (df['timestamp'] <= cutoff) & (emitted_until.isna() | (df['timestamp'] > emitted_until))
+        new_rows = df[ready]
+
+        # Forward fill continues from the values written by the previous run
+        new_rows = new_rows.ffill().fillna(value=state.ffill_values)
+        state.ffill_values.update({
+            col: new_rows[col].loc[new_rows[col].last_valid_index()]
+            for col in new_rows.columns
+            if new_rows[col].last_valid_index() is not None
+        })
+        output = new_rows.dropna()
+        if not output.empty:
+            state.pending_batch = uuid.uuid4().hex
+            stage_processed_dataset(output, output_path, state.pending_batch)
+
+        # Advance the watermarks and trim the carried-over context
+        state.emitted_until.update(new_rows.groupby('machine_id')['timestamp'].max().to_dict())
+        state.processed_until.update(processed_until.to_dict())
+        state.last_maintenance = last_maintenance.to_dict()
+        state.keep_tail('sensor', sensor, lookback)
+        state.keep_tail('env', env, lookback)
+        state.keep_tail('usage', usage, lookback)
+        state.save(state_path)
+
+        if state.pending_batch:
+            commit_staged_dataset(output_path, state.pending_batch)
+            state.pending_batch = None
+            state.save(state_path)
+
+        logging.info(f"Appended {len(output)} rows to {output_path}")
+        return output
+
+    except Exception as e:
+        logging.error(f"Incremental processing failed: {str(e)}")
+        raise
+
+
+if __name__ == "__main__":
+    try:
+        logging.info("Starting incremental 24-hour maintenance prediction data processing")
+        update_training_dataframe()
+    except Exception as e:
+        logging.error(f"Incremental pipeline execution failed: {str(e)}")
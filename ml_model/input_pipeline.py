@@ -0,0 +1,78 @@
+# input_pipeline.py
+import math
+import numpy as np
+import tensorflow as tf
+
+# Fractions of each machine's windows, in time order, used by each split
+TRAIN_SPLIT = (0.0, 0.64)
+VALIDATION_SPLIT = (0.64, 0.8)
+TEST_SPLIT = (0.8, 1.0)
+
+
+def count_windows(store, split, time_steps=None):
+    """Number of windows a split yields"""
+    return len(store.window_starts(split, time_steps=time_steps))
+
+
+def count_batches(store, split, batch_size, time_steps=None):
+    """Number of batches in one epoch of a split"""
+    return math.ceil(count_windows(store, split, time_steps) / batch_size)
+
+
+def epoch_order(n_windows, epoch, seed=None, shuffle=True):
+    """Window order of one epoch; with a seed it depends only on (seed, epoch)"""
+    if not shuffle:
+        return np.arange(n_windows)
+    rng = np.random.default_rng(None if seed is None else [seed, epoch])
+    return rng.permutation(n_windows)
+
+
+def make_window_dataset(store, split=TRAIN_SPLIT, batch_size=64, shuffle=True, seed=None,
+                        epochs=None, initial_epoch=0, skip_batches=0, time_steps=None):
+    """Stream window batches from a memory-mapped sequence store with tf.data
+
+    Only window positions (8 bytes each) live in the pipeline: they are
+    reshuffled globally every epoch and batched, and each batch of windows
+    is gathered straight from the memory-mapped feature matrix. Memory stays
+    bounded by the prefetched batches however large the store is.
+
+    By default every pass over the dataset is one epoch in a fresh order.
+    With ``epochs`` a single pass instead streams epochs ``initial_epoch``
+    to ``epochs - 1`` back to back, each ordered by (seed, epoch), starting
+    ``skip_batches`` into the first: the batches are then fixed by the
+    cursor alone, which is what resuming a run needs. Fit such a dataset
+    with ``steps_per_epoch`` so Keras keeps one iterator for the whole run.
+    ``time_steps`` overrides the window length the store was written for.
+    """
+    time_steps = time_steps or store.time_steps
+    windows = store.windows(split, time_steps=time_steps)
+    rng = np.random.default_rng(seed)
+
+    def batch_positions(first_epoch, last_epoch, skip):
+        for epoch in range(first_epoch, last_epoch):
+            if epochs is None:
+                order = rng.permutation(len(windows)) if shuffle else np.arange(len(windows))
+            else:
+                order = epoch_order(len(windows), epoch, seed, shuffle)
+            first = skip * batch_size if epoch == first_epoch else 0
+            for i in range(first, len(order), batch_size):
+                yield order[i:i + batch_size]
+
+    def gather(positions):
+        X, y = windows.gather(positions)
+        return np.asarray(X, dtype=np.float32), y.astype(np.float32)
+
+    def gather_batch(positions):
+        X, y = tf.numpy_function(gather, [positions], (tf.float32, tf.float32))
+        X.set_shape((None, time_steps, store.n_features))
+        y.set_shape((None,))
+        return X, y
+
+    last_epoch = initial_epoch + 1 if epochs is None else epochs
+    dataset = tf.data.Dataset.from_generator(
+        batch_positions,
+        args=(initial_epoch, last_epoch, skip_batches),
+        output_signature=tf.TensorSpec(shape=(None,), dtype=tf.int64)
+    )
+    dataset = dataset.map(gather_batch, num_parallel_calls=tf.data.AUTOTUNE, deterministic=True)
+    return dataset.prefetch(tf.data.AUTOTUNE)
@@ -0,0 +1,37 @@
+# labeling.py
+import numpy as np
+import pandas as pd
+
+
+def label_column(horizon, primary_horizon):
+    """Name of the target column for a horizon; the primary one keeps the legacy name"""
+    if pd.Timedelta(horizon) == pd.Timedelta(primary_horizon):
+        return 'needs_maintenance'
+    return f'needs_maintenance_{horizon}'
+
+
+def label_maintenance_horizons(timestamps, maintenance_dates, horizons):
+    """Flag readings followed by maintenance within each horizon
+
+    ``timestamps`` and ``maintenance_dates`` are one machine's sorted
+    datetime64 arrays. A reading at ``t`` is positive for horizon ``h`` when
+    a maintenance date falls in ``[t, t + h]``, matching a forward
+    ``merge_asof`` with tolerance ``h``. A single binary search finds the
+    next maintenance for every reading and is shared by all horizons.
+    """
+    ts = np.asarray(timestamps, dtype='datetime64[ns]').view(np.int64)
+    dates = np.asarray(maintenance_dates, dtype='datetime64[ns]').view(np.int64)
+
+    labels = {}
+    if len(dates) == 0:
+        for horizon in horizons:
+            labels[horizon] = np.zeros(len(ts), dtype=int)
+        return labels
+
+    idx = np.searchsorted(dates, ts, side='left')
+    has_next = idx < len(dates)
+    wait = np.where(has_next, dates[np.minimum(idx, len(dates) - 1)] - ts, np.iinfo(np.int64).max)
+
+    for horizon in horizons:
+        labels[horizon] = (wait <= pd.Timedelta(horizon).value).astype(int)
+    return labels
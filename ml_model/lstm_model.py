@@ -8,31 +8,45 @@ import numpy as np
 import logging
 
 class MaintenanceLSTM:
-    def __init__(self, input_shape):
+    def __init__(self, input_shape, learning_rate=0.001, jit_compile=False, unroll=False,
+                 lstm_implementation=2, units=(128, 64), dense_units=32, dropout=0.3,
+                 l2_weight=0.01):
         self.input_shape = input_shape
+        self.units = units
+        self.dense_units = dense_units
+        self.dropout = dropout
+        self.l2_weight = l2_weight
+        self.learning_rate = learning_rate
+        self.jit_compile = jit_compile
+        self.unroll = unroll
+        self.lstm_implementation = lstm_implementation
         self.model = self._build_model()
         logging.basicConfig(level=logging.INFO)
         
     def _build_model(self):
         """Build LSTM model architecture"""
         model = Sequential([
-            LSTM(128, 
+            LSTM(self.units[0], 
                  input_shape=self.input_shape,
                  return_sequences=True,
-                 kernel_regularizer=l2(0.01)),
+                 kernel_regularizer=l2(self.l2_weight),
+                 unroll=self.unroll,
+                 implementation=self.lstm_implementation),
             BatchNormalization(),
-            Dropout(0.3),
+            Dropout(self.dropout),
             
-            LSTM(64,
-                 kernel_regularizer=l2(0.01)),
+            LSTM(self.units[1],
+                 kernel_regularizer=l2(self.l2_weight),
+                 unroll=self.unroll,
+                 implementation=self.lstm_implementation),
             BatchNormalization(),
-            Dropout(0.3),
+            Dropout(self.dropout),
             
-            Dense(32, activation='relu'),
+            Dense(self.dense_units, activation='relu'),
             Dense(1, activation='sigmoid')
         ])
         
-        optimizer = Adam(learning_rate=0.001)
+        optimizer = Adam(learning_rate=self.learning_rate)
         model.compile(
             optimizer=optimizer,
             loss='binary_crossentropy',
@@ -41,7 +55,8 @@ class MaintenanceLSTM:
                 tf.keras.metrics.Precision(name='precision'),
                 tf.keras.metrics.Recall(name='recall'),
                 tf.keras.metrics.AUC(name='auc')
-            ]
+            ],
+            jit_compile=self.jit_compile
         )
         return model
     
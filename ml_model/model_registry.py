@@ -0,0 +1,138 @@
+# model_registry.py
+import os
+import json
+import time
+import uuid
+import shutil
+import logging
+import argparse
+import joblib
+import numpy as np
+from export_numpy_model import WEIGHT_TYPES
+from sequence_store import SEQUENCE_STORE_DIR, SequenceStore
+
+REGISTRY_DIR = 'model/registry'
+LATEST_FILE = 'LATEST'
+MANIFEST_FILE = 'manifest.json'
+# The scaler's mean_ and scale_ as plain arrays, so the service needs no sklearn
+SCALER_FILE = 'scaler.npz'
+
+
+def list_versions(registry_dir=REGISTRY_DIR):
+    """Published version names, oldest first"""
+    if not os.path.isdir(registry_dir):
+        return []
+    return sorted(
+        name for name in os.listdir(registry_dir)
+        if name.startswith('v') and os.path.exists(os.path.join(registry_dir, name, MANIFEST_FILE))
+    )
+
+
+def next_version(registry_dir=REGISTRY_DIR):
+    """The version after every vNNNN directory, published or not
+
+    Directories without a manifest (e.g. left by a crash) still hold their
+    name, so publishing never retries on one of them forever.
+    """
+    numbers = [int(name[1:]) for name in os.listdir(registry_dir)
+               if name.startswith('v') and name[1:].isdigit()] if os.path.isdir(registry_dir) else []
+    return f"v{max(numbers, default=0) + 1:04d}"
+
+
+def publish_model(model, scaler_path, feature_columns, time_steps, registry_dir=REGISTRY_DIR,
+                  h5_path=None, weights='float32', metrics=None, make_latest=True):
+    """Add a trained model to the registry as the next version
+
+    A version directory holds everything the service needs to score with
+    it: the NumPy export (``model.npz``), the matching scaler statistics
+    (``scaler.npz``), the feature schema and a manifest, plus the ``.h5`` when given. It is
+    assembled in a temporary directory and renamed into place, and the
+    LATEST pointer is replaced atomically, so the service never sees a
+    half-published version.
+    """
+    # TensorFlow is only needed here, not to list versions or move LATEST
+    from export_numpy_model import export_numpy_model
+    os.makedirs(registry_dir, exist_ok=True)
+    tmp = os.path.join(registry_dir, f".tmp-{uuid.uuid4().hex}")
+    os.makedirs(tmp)
+    try:
+        spec = export_numpy_model(model, os.path.join(tmp, 'model.npz'), weights)
+        scaler = joblib.load(scaler_path)
+        np.savez(os.path.join(tmp, SCALER_FILE), mean=scaler.mean_, scale=scaler.scale_)
+        if h5_path:
+            shutil.copy2(h5_path, os.path.join(tmp, 'model.h5'))
+        schema = {
+            'feature_columns': list(feature_columns),
+            'time_steps': time_steps,
+            'input_shape': spec['input_shape']
+        }
+        if schema['input_shape'] != [time_steps, len(schema['feature_columns'])]:
+            raise ValueError(f"Model input {schema['input_shape']} does not match "
+                             f"{time_steps} steps x {len(schema['feature_columns'])} features")
+        with open(os.path.join(tmp, 'schema.json'), 'w') as f:
+            json.dump(schema, f, indent=2)
+
+        # Pick the name last and retry, another publisher may have taken it
+        while True:
+            version = next_version(registry_dir)
+            with open(os.path.join(tmp, MANIFEST_FILE), 'w') as f:
+                json.dump({
+                    'version': version,
+                    'created': time.time(),
+                    'weights': weights,
+                    'metrics': metrics or {}
+                }, f, indent=2)
+            try:
+                os.rename(tmp, os.path.join(registry_dir, version))
+                break
+            except OSError:
+                if not os.path.exists(os.path.join(registry_dir, version)):
+                    raise
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    if make_latest:
+        set_latest(version, registry_dir)
+    logging.info(f"Published model {version} to {registry_dir}")
+    return version
+
+
+def set_latest(version, registry_dir=REGISTRY_DIR):
+    """Point LATEST at a version, e.g. to roll back"""
+    if version not in list_versions(registry_dir):
+        raise ValueError(f"Unknown model version {version} in {registry_dir}")
+    tmp = os.path.join(registry_dir, f"{LATEST_FILE}.{uuid.uuid4().hex}.tmp")
+    with open(tmp, 'w') as f:
+        f.write(version)
+    os.replace(tmp, os.path.join(registry_dir, LATEST_FILE))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description='Publish trained models to the local registry')
+    parser.add_argument('--registry', default=REGISTRY_DIR)
+    commands = parser.add_subparsers(dest='command', required=True)
+    publish = commands.add_parser('publish', help='Publish a trained .h5 as the next version')
+    publish.add_argument('--model', default='model/lstm_maintenance_final.h5')
+    publish.add_argument('--scaler', default='model/scaler.joblib')
+    publish.add_argument('--store', default=SEQUENCE_STORE_DIR,
+                         help='Sequence store the model was trained on, for the feature schema')
+    publish.add_argument('--weights', choices=WEIGHT_TYPES, default='float32')
+    publish.add_argument('--no-latest', action='store_true',
+                         help='Publish without pointing LATEST at it, e.g. for shadow scoring')
+    latest = commands.add_parser('latest', help='Point LATEST at an existing version')
+    latest.add_argument('version')
+    commands.add_parser('list', help='List published versions')
+    args = parser.parse_args()
+
+    if args.command == 'publish':
+        from tensorflow.keras.models import load_model
+        store = SequenceStore(args.store)
+        publish_model(load_model(args.model, compile=False), args.scaler, store.feature_columns,
+                      store.time_steps, args.registry, h5_path=args.model, weights=args.weights,
+                      make_latest=not args.no_latest)
+    elif args.command == 'latest':
+        set_latest(args.version, args.registry)
+    else:
+        for version in list_versions(args.registry):
+            print(version)
@@ -0,0 +1,127 @@
+# quantization_report.py
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import numpy as np
+from sklearn.metrics import roc_auc_score, precision_score, recall_score
+
+from sequence_store import SEQUENCE_STORE_DIR, SequenceStore
+from input_pipeline import TEST_SPLIT
+from export_numpy_model import export_numpy_model, WEIGHT_TYPES
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'service'))
+from models.numpy_lstm import NumpyLSTM
+
+
+def held_out_windows(store_dir, max_windows=None, seed=0):
+    """Test-split windows and labels, optionally a random subsample"""
+    windows = SequenceStore(store_dir).windows(TEST_SPLIT)
+    positions = np.arange(len(windows))
+    if max_windows and len(windows) > max_windows:
+        positions = np.sort(np.random.default_rng(seed).choice(len(windows), max_windows,
+                                                                replace=False))
+    X, y = windows.gather(positions)
+    return np.asarray(X, dtype=np.float32), np.asarray(y).astype(int).ravel()
+
+
+def predict_batched(predict, X, batch_size=1024):
+    return np.concatenate([
+        np.asarray(predict(X[i:i + batch_size])).ravel() for i in range(0, len(X), batch_size)
+    ])
+
+
+def classification_metrics(y, probabilities, threshold=0.5):
+    predicted = (probabilities >= threshold).astype(int)
+    return {
+        # AUC is undefined when the held-out set has a single class
+        'auc': float(roc_auc_score(y, probabilities)) if len(np.unique(y)) > 1 else None,
+        'precision': float(precision_score(y, predicted, zero_division=0)),
+        'recall': float(recall_score(y, predicted, zero_division=0))
+    }
+
+
+def latency_ms(predict, X, repeats=50):
+    """Median milliseconds of one call on X after a warm-up call"""
+    predict(X)
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predict(X)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times) * 1e3)
+
+
+def evaluate_variant(predict, X, y, reference, size_bytes, threshold):
+    probabilities = predict_batched(predict, X)
+    metrics = classification_metrics(y, probabilities, threshold)
+    return {
+        'size_kb': size_bytes / 1024,
+        'metrics': metrics,
+        'deltas': {
+            key: None if value is None or reference['metrics'][key] is None
+            else value - reference['metrics'][key]
+            for key, value in metrics.items()
+        } if reference else None,
+        'max_abs_prob_diff': float(np.abs(probabilities - reference['probabilities']).max())
+        if reference else 0.0,
+        'latency_ms_single': latency_ms(predict, X[:1]),
+        'latency_ms_batch64': latency_ms(predict, X[:64]),
+        'probabilities': probabilities
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Accuracy and latency of the float and quantized inference artifacts'
+    )
+    parser.add_argument('--model', default='model/lstm_maintenance_final.h5')
+    parser.add_argument('--store', default=SEQUENCE_STORE_DIR)
+    parser.add_argument('--max-windows', type=int, default=20000,
+                        help='Subsample the held-out split to this many windows')
+    parser.add_argument('--threshold', type=float, default=0.5)
+    parser.add_argument('--output', default=None, help='Write the JSON report here')
+    args = parser.parse_args()
+
+    from tensorflow.keras.models import load_model
+    model = load_model(args.model, compile=False)
+    X, y = held_out_windows(args.store, args.max_windows)
+    print(f"Held-out set: {len(X)} windows, {int(y.sum())} positive")
+
+    keras_predict = lambda batch: model(batch, training=False).numpy()
+    reference = evaluate_variant(keras_predict, X, y, None,
+                                 os.path.getsize(args.model), args.threshold)
+    report = {'keras': reference}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for weights in WEIGHT_TYPES:
+            path = os.path.join(tmp, f'model_{weights}.npz')
+            export_numpy_model(model, path, weights)
+            report[f'numpy_{weights}'] = evaluate_variant(
+                NumpyLSTM(path).predict, X, y, reference,
+                os.path.getsize(path), args.threshold
+            )
+
+    print(f"{'variant':<14} {'size KB':>8} {'AUC':>8} {'dAUC':>9} {'dPrec':>9} {'dRecall':>9} "
+          f"{'max|dp|':>9} {'1 win ms':>9} {'64 win ms':>9}")
+    for name, variant in report.items():
+        metrics, deltas = variant['metrics'], variant['deltas'] or {}
+        fmt = lambda value: f"{value:+9.4f}" if value is not None else f"{'-':>9}"
+        auc = f"{metrics['auc']:8.4f}" if metrics['auc'] is not None else f"{'-':>8}"
+        print(f"{name:<14} {variant['size_kb']:8.1f} {auc} {fmt(deltas.get('auc'))} "
+              f"{fmt(deltas.get('precision'))} {fmt(deltas.get('recall'))} "
+              f"{variant['max_abs_prob_diff']:9.2e} {variant['latency_ms_single']:9.2f} "
+              f"{variant['latency_ms_batch64']:9.2f}")
+
+    for variant in report.values():
+        del variant['probabilities']
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
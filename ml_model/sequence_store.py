@@ -0,0 +1,121 @@
+# sequence_store.py
+import os
+import json
+import numpy as np
+from sequences import TIME_STEPS, SlidingWindows, window_starts
+
+SEQUENCE_STORE_DIR = 'data_sequences'
+INDEX_FILE = 'index.json'
+ARRAY_FILES = ('features.npy', 'targets.npy', 'timestamps.npy')
+
+
+class SequenceStoreWriter:
+    """Write machines' normalized rows into one preallocated memory-mapped store
+
+    The store is a directory with ``features.npy`` (float32, rows x
+    features), ``targets.npy`` and ``timestamps.npy`` (one entry per row)
+    and ``index.json`` mapping each machine to its row range. Machines are
+    laid out back to back in the order they are reserved, and the reserved
+    ranges are filled, from any process, with ``open_for_update``.
+    """
+
+    def __init__(self, path, n_rows, feature_columns, time_steps=TIME_STEPS):
+        os.makedirs(path, exist_ok=True)
+        # Unlink an older store instead of writing through it: its files may
+        # still be mapped by readers or linked into the artifact cache
+        for name in ARRAY_FILES + (INDEX_FILE,):
+            if os.path.exists(os.path.join(path, name)):
+                os.remove(os.path.join(path, name))
+        self.path = path
+        self.feature_columns = list(feature_columns)
+        self.time_steps = time_steps
+        self.features = np.lib.format.open_memmap(
+            os.path.join(path, 'features.npy'), mode='w+', dtype=np.float32,
+            shape=(n_rows, len(self.feature_columns))
+        )
+        self.targets = np.lib.format.open_memmap(
+            os.path.join(path, 'targets.npy'), mode='w+', dtype=np.int8, shape=(n_rows,)
+        )
+        self.timestamps = np.lib.format.open_memmap(
+            os.path.join(path, 'timestamps.npy'), mode='w+', dtype='datetime64[ns]', shape=(n_rows,)
+        )
+        self.machines = []
+        self.offset = 0
+
+    def reserve(self, machine_id, n_rows):
+        """Assign the next n_rows rows to a machine and return the (start, stop) range"""
+        lo, hi = self.offset, self.offset + n_rows
+        if hi > len(self.features):
+            raise ValueError(f"Sequence store {self.path} holds {len(self.features)} rows, "
+                             f"machine {machine_id} needs rows up to {hi}")
+        self.machines.append({'machine_id': int(machine_id), 'row_start': lo, 'row_stop': hi})
+        self.offset = hi
+        return lo, hi
+
+    def close(self):
+        """Flush the arrays and write the index, which marks the store complete"""
+        for array in (self.features, self.targets, self.timestamps):
+            array.flush()
+        index = {
+            'time_steps': self.time_steps,
+            'n_rows': self.offset,
+            'feature_columns': self.feature_columns,
+            'machines': self.machines
+        }
+        with open(os.path.join(self.path, INDEX_FILE), 'w') as f:
+            json.dump(index, f, indent=2)
+
+
+def open_for_update(path):
+    """Open an unfinished store's (features, targets, timestamps) arrays read-write"""
+    return tuple(np.load(os.path.join(path, name), mmap_mode='r+') for name in ARRAY_FILES)
+
+
+class SequenceStore:
+    """Read-only view of a sequence store, shared through the OS page cache
+
+    Arrays are opened with ``mmap_mode='r'``, so opening is instant, nothing
+    is copied until a batch is gathered, and several processes reading the
+    same store share one cached copy.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, INDEX_FILE)) as f:
+            self.index = json.load(f)
+        self.time_steps = self.index['time_steps']
+        self.feature_columns = self.index['feature_columns']
+        self.machines = self.index['machines']
+        n_rows = self.index['n_rows']
+        self.features = np.load(os.path.join(path, 'features.npy'), mmap_mode='r')[:n_rows]
+        self.targets = np.load(os.path.join(path, 'targets.npy'), mmap_mode='r')[:n_rows]
+        self.timestamps = np.load(os.path.join(path, 'timestamps.npy'), mmap_mode='r')[:n_rows]
+
+    @property
+    def n_features(self):
+        return len(self.feature_columns)
+
+    def window_starts(self, split=(0.0, 1.0), machine_ids=None, time_steps=None):
+        """Global start rows of each machine's windows within a time-ordered split
+
+        The store holds rows, not windows, so ``time_steps`` may differ from
+        the length the store was written for.
+        """
+        time_steps = time_steps or self.time_steps
+        lo, hi = split
+        starts = []
+        for machine in self.machines:
+            if machine_ids is not None and machine['machine_id'] not in machine_ids:
+                continue
+            local = window_starts(machine['row_stop'] - machine['row_start'], time_steps)
+            local = local[int(len(local) * lo):int(len(local) * hi)]
+            starts.append(local + machine['row_start'])
+        return np.concatenate(starts) if starts else np.array([], dtype=np.int64)
+
+    def windows(self, split=(0.0, 1.0), machine_ids=None, time_steps=None):
+        """SlidingWindows over the memory-mapped rows for a split"""
+        time_steps = time_steps or self.time_steps
+        return SlidingWindows(
+            self.features, self.targets, self.window_starts(split, machine_ids, time_steps),
+            time_steps
+        )
@@ -0,0 +1,39 @@
+# sequences.py
+import numpy as np
+
+TIME_STEPS = 24
+
+
+def window_starts(n_rows, time_steps=TIME_STEPS):
+    """Start rows of every full window whose label row (start + time_steps) exists"""
+    return np.arange(max(n_rows - time_steps, 0), dtype=np.int64)
+
+
+class SlidingWindows:
+    """Fixed-length windows over row-aligned feature matrices, built on demand
+
+    Holds the normalized features and targets of one or more machines
+    concatenated row-wise, plus the global start row of every window. A
+    window covers rows ``[start, start + time_steps)`` and is labelled with
+    the target of row ``start + time_steps``, so windows never straddle two
+    machines as long as each machine contributes its own starts.
+    """
+
+    def __init__(self, features, targets, starts, time_steps=TIME_STEPS):
+        self.features = features
+        self.targets = targets
+        self.starts = starts
+        self.time_steps = time_steps
+
+    def __len__(self):
+        return len(self.starts)
+
+    @property
+    def shape(self):
+        return (len(self), self.time_steps, self.features.shape[1])
+
+    def gather(self, positions):
+        """Copy out the windows and labels at the given positions as one batch"""
+        starts = self.starts[positions]
+        rows = starts[:, None] + np.arange(self.time_steps)
+        return self.features[rows], self.targets[starts + self.time_steps]
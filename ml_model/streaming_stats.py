@@ -0,0 +1,102 @@
+# streaming_stats.py
+import numpy as np
+import pandas as pd
+
+
+class StreamingCorrelation:
+    """One-pass correlation matrix over a stream of DataFrame chunks
+
+    Keeps the row count, column means and the matrix of centred co-moments,
+    and folds each chunk in with the pairwise update of Chan et al., which
+    stays numerically stable where naive sums of squares do not. Rows with a
+    missing value in any tracked column are skipped (complete-case).
+    """
+
+    def __init__(self, columns=None):
+        self.columns = list(columns) if columns is not None else None
+        self.count = 0
+        self.mean = None
+        self.comoment = None
+
+    def update(self, chunk):
+        """Fold one chunk into the running statistics"""
+        if self.columns is None:
+            self.columns = chunk.select_dtypes(include=np.number).columns.tolist()
+        values = chunk[self.columns].to_numpy(dtype='float64')
+        values = values[~np.isnan(values).any(axis=1)]
+        if len(values) == 0:
+            return self
+
+        chunk_mean = values.mean(axis=0)
+        centred = values - chunk_mean
+        self._combine(len(values), chunk_mean, centred.T @ centred)
+        return self
+
+    def merge(self, other):
+        """Combine statistics gathered independently, e.g. one per partition"""
+        if other.count == 0:
+            return self
+        if self.columns is None:
+            self.columns = other.columns
+        self._combine(other.count, other.mean, other.comoment)
+        return self
+
+    def _combine(self, count, mean, comoment):
+        if self.count == 0:
+            self.count, self.mean, self.comoment = count, mean, comoment
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.comoment = self.comoment + comoment + np.outer(delta, delta) * (self.count * count / total)
+        self.mean = self.mean + delta * (count / total)
+        self.count = total
+
+    def corr(self):
+        """Pearson correlation matrix as a DataFrame, NaN for constant columns"""
+        if self.count < 2:
+            return pd.DataFrame(np.nan, index=self.columns, columns=self.columns)
+        std = np.sqrt(np.diag(self.comoment))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = self.comoment / np.outer(std, std)
+        corr[(std == 0)[:, None] | (std == 0)[None, :]] = np.nan
+        return pd.DataFrame(np.clip(corr, -1, 1), index=self.columns, columns=self.columns)
+
+
+class ReservoirSample:
+    """Uniform fixed-size row sample over a stream of chunks (algorithm R)"""
+
+    def __init__(self, size, seed=42):
+        self.size = size
+        self.seen = 0
+        self.sample = None
+        self.rng = np.random.default_rng(seed)
+
+    def update(self, chunk):
+        """Offer every row of a chunk to the reservoir"""
+        chunk = chunk.reset_index(drop=True)
+
+        # Fill the reservoir first
+        if self.sample is None or len(self.sample) < self.size:
+            free = self.size if self.sample is None else self.size - len(self.sample)
+            head = chunk.iloc[:free]
+            self.sample = head.copy() if self.sample is None else pd.concat(
+                [self.sample, head], ignore_index=True
+            )
+            self.seen += len(head)
+            chunk = chunk.iloc[free:].reset_index(drop=True)
+        if chunk.empty:
+            return self
+
+        # Row i of the stream replaces a random slot with probability size / (i + 1)
+        positions = self.seen + np.arange(len(chunk))
+        slots = self.rng.integers(0, positions + 1)
+        keep = np.flatnonzero(slots < self.size)
+        if len(keep):
+            # Later rows overwrite earlier ones that drew the same slot
+            slots, rows = slots[keep], keep
+            last = np.unique(slots[::-1], return_index=True)[1]
+            slots, rows = slots[::-1][last], rows[::-1][last]
+            for col in self.sample.columns:
+                self.sample.loc[slots, col] = chunk[col].to_numpy()[rows]
+        self.seen += len(chunk)
+        return self
@@ -0,0 +1,315 @@
+# sweep.py
+import os
+import json
+import contextlib
+import shutil
+import math
+import logging
+import argparse
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from dataset_store import DATASET_DIR
+from sequence_store import INDEX_FILE
+from sequences import TIME_STEPS
+from artifact_cache import fingerprint, directory_snapshot
+
+SWEEP_DIR = 'sweep'
+# Fingerprint of the dataset the sweep's sequence store was written from
+STORE_KEY_FILE = 'sequences.key'
+
+# Searched when no grid file is given
+DEFAULT_GRID = {
+    'units': [[128, 64], [64, 32]],
+    'dropout': [0.2, 0.3],
+    'l2_weight': [0.01, 0.001],
+    'time_steps': [24, 48],
+    'learning_rate': [0.001, 0.0003]
+}
+
+
+def grid_trials(grid, n_trials=None, seed=42):
+    """Every combination of the grid, or a seeded random subset of n_trials of them"""
+    names = sorted(grid)
+    trials = [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+    if n_trials is not None and n_trials < len(trials):
+        rng = np.random.default_rng(seed)
+        trials = [trials[i] for i in sorted(rng.choice(len(trials), n_trials, replace=False))]
+    return [dict(trial, trial_id=i) for i, trial in enumerate(trials)]
+
+
+def rung_budgets(min_epochs, max_epochs, eta):
+    """Cumulative epoch budget of each successive-halving rung"""
+    if min_epochs < 1:
+        raise ValueError(f"min_epochs must be at least 1, got {min_epochs}")
+    if eta <= 1:
+        raise ValueError(f"eta must be greater than 1, got {eta}")
+    budgets = []
+    epochs = min_epochs
+    while epochs < max_epochs:
+        budgets.append(epochs)
+        epochs *= eta
+    return budgets + [max_epochs]
+
+
+_WORKER = {}
+THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS')
+
+
+@contextlib.contextmanager
+def worker_environment(threads):
+    """Environment inherited by spawned trial processes, restored afterwards
+
+    BLAS reads its thread count when NumPy is first imported, which in a
+    spawned worker happens while unpickling, before any initializer runs,
+    so the limits have to be in place when the process is started.
+    """
+    values = {var: str(threads) for var in THREAD_ENV_VARS}
+    values['TF_CPP_MIN_LOG_LEVEL'] = '2'
+    saved = {var: os.environ.get(var) for var in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for var, value in saved.items():
+            if value is None:
+                os.environ.pop(var, None)
+            else:
+                os.environ[var] = value
+
+
+def _init_worker(store_dir, threads):
+    """Bound this trial process's TensorFlow thread pools and open the shared store once"""
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+    from sequence_store import SequenceStore
+    _WORKER['store'] = SequenceStore(store_dir)
+
+
+def _run_trial(trial, epochs, trial_dir, batch_size, seed):
+    """Train one trial up to a cumulative epoch budget, continuing from its last rung"""
+    import tensorflow as tf
+    from input_pipeline import TRAIN_SPLIT, VALIDATION_SPLIT, count_batches, make_window_dataset
+    from lstm_model import MaintenanceLSTM
+    from training_state import TrainingState, TrainingStateCheckpoint
+
+    store = _WORKER['store']
+    time_steps = trial['time_steps']
+    tf.keras.utils.set_random_seed(seed)
+    model = MaintenanceLSTM(
+        (time_steps, store.n_features),
+        learning_rate=trial['learning_rate'],
+        units=tuple(trial['units']),
+        dropout=trial['dropout'],
+        l2_weight=trial['l2_weight']
+    )
+    state = TrainingState(model.model, trial_dir, seed=seed, max_to_keep=1)
+    state.restore()
+    initial_epoch = int(state.epoch.numpy())
+
+    train_data = make_window_dataset(
+        store, TRAIN_SPLIT, batch_size=batch_size, seed=seed, epochs=epochs,
+        initial_epoch=initial_epoch, time_steps=time_steps
+    )
+    val_data = make_window_dataset(
+        store, VALIDATION_SPLIT, batch_size=batch_size, shuffle=False, time_steps=time_steps
+    )
+    model.model.fit(
+        train_data,
+        validation_data=val_data,
+        epochs=epochs,
+        initial_epoch=initial_epoch,
+        steps_per_epoch=count_batches(store, TRAIN_SPLIT, batch_size, time_steps),
+        callbacks=[TrainingStateCheckpoint(state, save_every=0)],
+        verbose=0
+    )
+    return {
+        key: values[-1] for key, values in state.history.items() if key.startswith('val_')
+    }
+
+
+class SuccessiveHalving:
+    """Run trials in a process pool, keeping the best 1/eta of them at each rung
+
+    Every trial first trains for ``min_epochs``; the best ``1 / eta`` by the
+    validation metric go on to ``eta`` times the budget, and so on up to
+    ``max_epochs``. Survivors continue from their checkpointed state, so no
+    epoch is trained twice. All trials read the same memory-mapped sequence
+    store, which the OS page cache shares between processes.
+    """
+
+    def __init__(self, store_dir, sweep_dir=SWEEP_DIR, n_procs=1, threads_per_trial=1,
+                 min_epochs=1, max_epochs=9, eta=3, batch_size=64, metric='val_auc', seed=42):
+        self.store_dir = store_dir
+        self.sweep_dir = sweep_dir
+        self.n_procs = n_procs
+        self.threads_per_trial = threads_per_trial
+        self.budgets = rung_budgets(min_epochs, max_epochs, eta)
+        self.eta = eta
+        self.batch_size = batch_size
+        self.metric = metric
+        self.seed = seed
+        self.results = []
+
+    def trial_dir(self, trial):
+        return os.path.join(self.sweep_dir, 'trials', f"trial_{trial['trial_id']:04d}")
+
+    def run(self, trials):
+        """Run the sweep and return the results table, best trials first"""
+        shutil.rmtree(os.path.join(self.sweep_dir, 'trials'), ignore_errors=True)
+        # Spawned workers start clean; TensorFlow does not survive a fork
+        context = multiprocessing.get_context('spawn')
+        # Workers are started on demand, so the environment stays set for the whole run
+        with worker_environment(self.threads_per_trial), ProcessPoolExecutor(
+            max_workers=self.n_procs,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(self.store_dir, self.threads_per_trial)
+        ) as executor:
+            alive = list(trials)
+            for rung, epochs in enumerate(self.budgets):
+                logging.info(f"Rung {rung}: {len(alive)} trials to {epochs} epochs")
+                futures = [
+                    executor.submit(_run_trial, trial, epochs, self.trial_dir(trial),
+                                    self.batch_size, self.seed)
+                    for trial in alive
+                ]
+                scored = []
+                for trial, future in zip(alive, futures):
+                    try:
+                        metrics = future.result()
+                    except Exception as e:
+                        logging.error(f"Trial {trial['trial_id']} failed: {str(e)}")
+                        metrics = {}
+                    scored.append((trial, metrics))
+
+                # Failed trials rank last and are never promoted
+                keep = max(1, len(alive) // self.eta) if rung < len(self.budgets) - 1 else 0
+                lower_is_better = self.metric.endswith('loss')
+                ranked = sorted(
+                    scored,
+                    key=lambda item: self._sort_key(item[1].get(self.metric), lower_is_better)
+                )
+                for position, (trial, metrics) in enumerate(ranked):
+                    promoted = position < keep and self.metric in metrics
+                    self.record(trial, rung, epochs, metrics, promoted)
+                alive = [trial for trial, metrics in ranked[:keep] if self.metric in metrics]
+                if not alive:
+                    break
+        return self.table()
+
+    @staticmethod
+    def _sort_key(value, lower_is_better):
+        if value is None or math.isnan(value):
+            return math.inf
+        return value if lower_is_better else -value
+
+    def record(self, trial, rung, epochs, metrics, promoted):
+        row = {'trial_id': trial['trial_id']}
+        row.update((key, value) for key, value in trial.items() if key != 'trial_id')
+        row['units'] = '-'.join(str(u) for u in trial['units'])
+        row.update(rung=rung, epochs=epochs, promoted=promoted, **metrics)
+        self.results.append(row)
+        self.table().to_csv(os.path.join(self.sweep_dir, 'results.csv'), index=False)
+
+    def table(self):
+        """One row per trial and rung, best final scores first"""
+        df = pd.DataFrame(self.results)
+        if self.metric not in df.columns:
+            return df
+        ascending = self.metric.endswith('loss')
+        return df.sort_values(['rung', self.metric], ascending=[False, ascending],
+                              na_position='last', ignore_index=True)
+
+
+def prepare_store(dataset_dir, sweep_dir, n_jobs=1):
+    """Write the shared sequence store, reusing it while the dataset is unchanged
+
+    The store is keyed on a snapshot of the dataset's files and the window
+    length, as in the artifact cache, so a rebuilt or appended dataset never
+    has its trials scored on stale windows.
+    """
+    from train import preprocess_and_save_sequences
+
+    store_dir = os.path.join(sweep_dir, 'sequences')
+    key_path = os.path.join(sweep_dir, STORE_KEY_FILE)
+    key = fingerprint({'dataset': directory_snapshot(dataset_dir), 'time_steps': TIME_STEPS})
+    stored_key = None
+    if os.path.exists(key_path):
+        with open(key_path) as f:
+            stored_key = f.read().strip()
+
+    if stored_key == key and os.path.exists(os.path.join(store_dir, INDEX_FILE)):
+        logging.info(f"Reusing sequence store {store_dir}")
+        return store_dir
+    if os.path.exists(store_dir):
+        logging.info(f"{dataset_dir} changed since {store_dir} was written, rebuilding it")
+    if os.path.exists(key_path):
+        os.remove(key_path)
+    preprocess_and_save_sequences(
+        dataset_dir, store_dir, n_jobs=n_jobs,
+        scaler_path=os.path.join(sweep_dir, 'scaler.joblib')
+    )
+    with open(key_path, 'w') as f:
+        f.write(key)
+    return store_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Successive-halving sweep over MaintenanceLSTM')
+    parser.add_argument('--dataset', default=DATASET_DIR)
+    parser.add_argument('--sweep-dir', default=SWEEP_DIR)
+    parser.add_argument('--grid', default=None,
+                        help='JSON file mapping each hyperparameter to the values to try')
+    parser.add_argument('--trials', type=int, default=None,
+                        help='Random subset of the grid to run (all combinations by default)')
+    parser.add_argument('--procs', type=int, default=max(1, (os.cpu_count() or 1) // 2),
+                        help='Trials trained at the same time')
+    parser.add_argument('--threads-per-trial', type=int, default=2)
+    parser.add_argument('--min-epochs', type=int, default=1)
+    parser.add_argument('--max-epochs', type=int, default=9)
+    parser.add_argument('--eta', type=int, default=3,
+                        help='Keep the best 1/eta trials at each rung')
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--metric', default='val_auc',
+                        help='Validation metric that ranks trials (losses are minimized)')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='Processes used to write the sequence store')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    os.makedirs(args.sweep_dir, exist_ok=True)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(os.path.join(args.sweep_dir, 'sweep.log')),
+            logging.StreamHandler()
+        ]
+    )
+
+    grid = DEFAULT_GRID
+    if args.grid:
+        with open(args.grid) as f:
+            grid = json.load(f)
+    trials = grid_trials(grid, args.trials, args.seed)
+
+    store_dir = prepare_store(args.dataset, args.sweep_dir, args.jobs)
+    sweep = SuccessiveHalving(
+        store_dir, args.sweep_dir, n_procs=args.procs, threads_per_trial=args.threads_per_trial,
+        min_epochs=args.min_epochs, max_epochs=args.max_epochs, eta=args.eta,
+        batch_size=args.batch_size, metric=args.metric, seed=args.seed
+    )
+    logging.info(f"Sweeping {len(trials)} trials over rungs {sweep.budgets} "
+                 f"on {args.procs} processes x {args.threads_per_trial} threads")
+    results = sweep.run(trials)
+    print(results.head(10).to_string(index=False))
+    logging.info(f"Results written to {os.path.join(args.sweep_dir, 'results.csv')}")
+
+
+if __name__ == "__main__":
+    main()
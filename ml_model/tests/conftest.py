@@ -0,0 +1,101 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+# The pipeline modules import each other by name and log to logs/, as when run
+# from ml_model/; each test then runs in its own empty directory
+ML_MODEL_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ML_MODEL_DIR)
+os.chdir(ML_MODEL_DIR)
+
+
+def make_source_tables(n_machines=4, n_hours=240, seed=0):
+    """Raw source tables shaped like the database's, for n_machines hourly sensors"""
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp('2024-01-01')
+    machine_ids = np.repeat(np.arange(1, n_machines + 1), n_hours)
+    timestamps = start + pd.to_timedelta(np.tile(np.arange(n_hours), n_machines), unit='h')
+    n_rows = len(machine_ids)
+    sensor = pd.DataFrame({
+        'sensor_id': np.arange(n_rows),
+        'machine_id': machine_ids,
+        'timestamp': timestamps,
+        'temperature': rng.normal(60, 5, n_rows),
+        'vibration': rng.gamma(2, 0.5, n_rows),
+        'load': rng.uniform(0, 100, n_rows),
+        'cycle_time': rng.uniform(10, 60, n_rows),
+        'power_consumption': rng.uniform(100, 500, n_rows)
+    })
+    machines = pd.DataFrame({
+        'machine_id': np.arange(1, n_machines + 1),
+        'machine_model_id': 1,
+        'machine_type_id': 2,
+        'installation_date': pd.Timestamp('2023-01-01')
+    })
+    n_tasks = 6 * n_machines
+    maintenance_tasks = pd.DataFrame({
+        'maintenance_task_id': np.arange(n_tasks),
+        'machine_id': np.tile(np.arange(1, n_machines + 1), 6)
+    })
+    maintenance_logs = pd.DataFrame({
+        'maintenance_task_id': np.arange(n_tasks),
+        'date': start + pd.to_timedelta(rng.integers(0, n_hours, n_tasks), unit='h')
+    })
+    env_rows = rng.random(n_rows) < 0.3
+    env = pd.DataFrame({
+        'machine_id': machine_ids[env_rows],
+        'timestamp': timestamps[env_rows],
+        'temperature_external': rng.normal(20, 3, env_rows.sum()),
+        'humidity': rng.uniform(30, 70, env_rows.sum())
+    })
+    usage_rows = rng.random(n_rows) < 0.5
+    usage = pd.DataFrame({
+        'machine_id': machine_ids[usage_rows],
+        'timestamp': timestamps[usage_rows],
+        'working_hours': rng.uniform(0, 24, usage_rows.sum())
+    })
+    return {
+        'sensor': sensor,
+        'machines': machines,
+        'maintenance_logs': maintenance_logs,
+        'maintenance_tasks': maintenance_tasks,
+        'env': env,
+        'usage': usage
+    }
+
+
+class FakeDatabase:
+    """Stands in for load_data_from_db; ``until`` is the newest data that has arrived"""
+
+    def __init__(self, tables):
+        self.tables = tables
+        self.until = None
+
+    def load(self, watermarks=None, maintenance_since=None):
+        data = {}
+        for name, table in self.tables.items():
+            time_column = 'date' if name == 'maintenance_logs' else 'timestamp'
+            if self.until is not None and time_column in table:
+                table = table[table[time_column] <= self.until]
+            if watermarks is not None and name in ('sensor', 'env', 'usage'):
+                mark = pd.to_datetime(table['machine_id'].map(watermarks))
+                table = table[mark.isna() | (table['timestamp'] > mark)]
+            if maintenance_since is not None and name == 'maintenance_logs':
+                table = table[table['date'] > maintenance_since]
+            data[name] = table.reset_index(drop=True)
+        return (data['sensor'], data['machines'], data['maintenance_logs'],
+                data['maintenance_tasks'], data['env'], data['usage'])
+
+
+@pytest.fixture
+def fake_db(monkeypatch, tmp_path):
+    """Fake source database patched into the pipelines, run from an empty directory"""
+    import data_processing
+    import incremental_processing
+    db = FakeDatabase(make_source_tables())
+    monkeypatch.setattr(data_processing, 'load_data_from_db', db.load)
+    monkeypatch.setattr(incremental_processing, 'load_data_from_db', db.load)
+    monkeypatch.chdir(tmp_path)
+    return db
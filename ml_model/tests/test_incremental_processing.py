@@ -0,0 +1,34 @@
+import pandas as pd
+from data_processing import create_training_dataframe
+from dataset_store import write_processed_dataset, read_processed_dataset
+from incremental_processing import update_training_dataframe
+
+
+def duplicate_rows(dataset_dir):
+    df = read_processed_dataset(dataset_dir, columns=['machine_id', 'timestamp'])
+    return int(df.duplicated().sum()), len(df)
+
+
+def test_incremental_runs_append_each_row_once(fake_db):
+    fake_db.until = pd.Timestamp('2024-01-05')
+    update_training_dataframe()
+    fake_db.until = pd.Timestamp('2024-01-08')
+    update_training_dataframe()
+    duplicates, rows = duplicate_rows('processed_maintenance_prediction_data')
+    assert rows > 0
+    assert duplicates == 0
+
+
+def test_incremental_after_full_rebuild_starts_over(fake_db):
+    fake_db.until = pd.Timestamp('2024-01-05')
+    update_training_dataframe()
+
+    # A full build replaces the dataset the feature state was describing
+    fake_db.until = pd.Timestamp('2024-01-07')
+    write_processed_dataset(create_training_dataframe())
+
+    fake_db.until = pd.Timestamp('2024-01-09')
+    update_training_dataframe()
+    duplicates, rows = duplicate_rows('processed_maintenance_prediction_data')
+    assert rows > 0
+    assert duplicates == 0
@@ -0,0 +1,39 @@
+import os
+import pytest
+import train
+from data_processing import create_training_dataframe
+from dataset_store import write_processed_dataset
+from training_state import TrainingState
+
+
+@pytest.fixture
+def training_dir(fake_db, monkeypatch):
+    """A processed dataset to train on, with one-epoch runs"""
+    write_processed_dataset(create_training_dataframe())
+    os.makedirs('model')
+    monkeypatch.setattr(train, 'EPOCHS', 1)
+    return fake_db
+
+
+def test_resume_after_early_crash_does_not_restore_an_older_run(training_dir, monkeypatch):
+    train.main(seed=7, save_every=1, cache_dir=None)
+    assert os.listdir(train.STATE_DIR)
+
+    # A new run crashes before its first checkpoint
+    def crash(*args, **kwargs):
+        raise RuntimeError("interrupted")
+    with monkeypatch.context() as patch:
+        patch.setattr(train, 'build_sequence_store', crash)
+        with pytest.raises(RuntimeError):
+            train.main(seed=11, save_every=1, cache_dir=None)
+    assert not os.path.exists(train.STATE_DIR)
+    assert not os.path.exists(train.TRAINING_CONFIG_PATH)
+
+    restored = []
+    original_restore = TrainingState.restore
+    def record_restore(self):
+        restored.append(original_restore(self))
+        return restored[-1]
+    monkeypatch.setattr(TrainingState, 'restore', record_restore)
+    train.main(resume=True, seed=11, save_every=1, cache_dir=None)
+    assert restored == [False]
@@ -0,0 +1,81 @@
+# time_join.py
+import numpy as np
+import pandas as pd
+from rolling_features import group_boundaries
+
+
+def match_positions(timestamps, side_timestamps, tolerance, direction='backward'):
+    """Positions of the as-of match for each timestamp in a sorted side index, -1 if none
+
+    ``timestamps`` and ``side_timestamps`` are int64 nanoseconds for one
+    machine. Ties on the side index resolve to the last row, as in
+    ``merge_asof``.
+    """
+    n = len(side_timestamps)
+    if n == 0:
+        return np.full(len(timestamps), -1, dtype=np.int64)
+
+    backward = np.searchsorted(side_timestamps, timestamps, side='right') - 1
+    backward_gap = timestamps - side_timestamps[np.maximum(backward, 0)]
+    backward_gap[backward < 0] = np.iinfo(np.int64).max
+
+    if direction == 'backward':
+        pos, gap = backward, backward_gap
+    else:
+        forward = np.searchsorted(side_timestamps, timestamps, side='left')
+        forward_gap = side_timestamps[np.minimum(forward, n - 1)] - timestamps
+        forward_gap[forward >= n] = np.iinfo(np.int64).max
+        if direction == 'forward':
+            pos, gap = forward, forward_gap
+        elif direction == 'nearest':
+            use_forward = forward_gap < backward_gap
+            pos = np.where(use_forward, forward, backward)
+            gap = np.where(use_forward, forward_gap, backward_gap)
+        else:
+            raise ValueError(f"Unknown join direction: {direction}")
+
+    return np.where(gap <= tolerance, pos, -1)
+
+
+def asof_join(df, side_tables, tolerance, direction='backward', by='machine_id', on='timestamp'):
+    """Attach columns from any number of side tables with bounded per-machine as-of matches
+
+    ``side_tables`` is a list of ``(frame, columns)`` pairs. Each row of
+    ``df`` takes the values of at most one side row of the same machine whose
+    timestamp is within ``tolerance`` in the given ``direction``
+    ('backward', 'forward' or 'nearest'); rows without a match get NaN.
+    Unlike an exact merge, duplicate side rows never multiply ``df`` rows.
+    The row order and length of ``df`` are preserved.
+    """
+    tolerance = pd.Timedelta(tolerance).value
+    keys = df[by].to_numpy()
+    ts = df[on].to_numpy(dtype='datetime64[ns]').view(np.int64)
+
+    # Per-machine index over df, built once and shared by every side table
+    order = np.argsort(keys, kind='stable')
+    starts, stops = group_boundaries(keys[order])
+
+    sides = []
+    for frame, columns in side_tables:
+        frame = frame.sort_values([by, on], kind='mergesort', ignore_index=True)
+        side_keys = frame[by].to_numpy()
+        side_ts = frame[on].to_numpy(dtype='datetime64[ns]').view(np.int64)
+        side_starts, side_stops = group_boundaries(side_keys)
+        ranges = {side_keys[lo]: (lo, hi) for lo, hi in zip(side_starts, side_stops)}
+        sides.append((frame, columns, side_ts, ranges, np.full(len(df), -1, dtype=np.int64)))
+
+    for lo, hi in zip(starts, stops):
+        rows = order[lo:hi]
+        machine = keys[rows[0]]
+        for frame, columns, side_ts, ranges, matches in sides:
+            if machine not in ranges:
+                continue
+            side_lo, side_hi = ranges[machine]
+            pos = match_positions(ts[rows], side_ts[side_lo:side_hi], tolerance, direction)
+            matches[rows] = np.where(pos >= 0, pos + side_lo, -1)
+
+    df = df.copy()
+    for frame, columns, side_ts, ranges, matches in sides:
+        for col in columns:
+            df[col] = frame[col].reindex(matches).to_numpy()
+    return df
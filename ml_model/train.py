@@ -1,11 +1,54 @@
 import os
 import numpy as np
-import pandas as pd
-from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 from lstm_model import MaintenanceLSTM
+from dataset_store import (
+    DATASET_DIR,
+    iter_processed_dataset,
+    iter_machine_frames,
+    machine_row_counts,
+    dataset_columns
+)
+from sequences import TIME_STEPS
+from sequence_store import (
+    SEQUENCE_STORE_DIR,
+    INDEX_FILE,
+    SequenceStore,
+    SequenceStoreWriter,
+    open_for_update
+)
+from input_pipeline import (
+    TRAIN_SPLIT,
+    VALIDATION_SPLIT,
+    count_windows,
+    count_batches,
+    make_window_dataset
+)
+from training_profiles import PROFILES, resolve_profile, apply_profile, save_config, load_config
+from training_state import (
+    STATE_DIR,
+    TrainingState,
+    TrainingStateCheckpoint,
+    clear_training_state
+)
+from export_numpy_model import export_numpy_model
+from model_registry import publish_model
+from artifact_cache import (
+    CACHE_DIR,
+    ArtifactCache,
+    code_version,
+    directory_snapshot,
+    link_tree,
+    link_file
+)
+import dataset_store
+import sequence_store
+import sequences
 import logging
-import gc  # Garbage collection
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import tensorflow as tf
 from tensorflow.keras.callbacks import ModelCheckpoint
 import joblib
 import pickle
@@ -23,125 +66,234 @@ logging.basicConfig(
     ]
 )
 
-def load_data_in_chunks(file_path, chunk_size=100000):
-    """Load data in chunks to reduce memory usage"""
-    try:
-        chunks = pd.read_csv(file_path, chunksize=chunk_size)
-        df = pd.concat(chunks)
-        logging.info(f"Data loaded. Shape: {df.shape}")
-        return df
-    except Exception as e:
-        logging.error(f"Error loading data: {str(e)}")
-        raise
+SCALER_PATH = 'model/scaler.joblib'
+TRAINING_CONFIG_PATH = 'model/training_config.json'
+EPOCHS = 20
 
-def preprocess_and_save_sequences(df, output_dir='data_sequences'):
-    """Process data in batches and save sequences to disk"""
-    os.makedirs(output_dir, exist_ok=True)
-    
-    # Initialize scaler
-    features = df.drop(columns=['needs_maintenance', 'machine_id', 'timestamp'])
+def feature_columns(columns):
+    """Model input columns: everything except ids, time and label horizons"""
+    return [
+        col for col in columns
+        if col not in ('machine_id', 'timestamp') and not col.startswith('needs_maintenance')
+    ]
+
+def fit_scaler(dataset_dir=DATASET_DIR, columns=None, batch_size=100000,
+               scaler_path=SCALER_PATH):
+    """Fit the feature scaler incrementally over streamed chunks and persist it"""
+    if columns is None:
+        columns = feature_columns(dataset_columns(dataset_dir))
     scaler = StandardScaler()
-    scaler.fit(features)
-    joblib.dump(scaler, 'model/scaler.joblib')
+    for chunk in iter_processed_dataset(dataset_dir, columns=columns, batch_size=batch_size):
+        scaler.partial_fit(chunk)
+    tmp_path = f"{scaler_path}.tmp"
+    joblib.dump(scaler, tmp_path)
+    os.replace(tmp_path, scaler_path)
+    logging.info(f"Scaler fitted on {scaler.n_samples_seen_} rows and saved to {scaler_path}")
+    return scaler
+
+_SHARED = {}
+
+def _write_machine_shard(shard):
+    """Normalize a block of machines and write them into their reserved store rows"""
+    columns, scaler = _SHARED['columns'], _SHARED['scaler']
+    features, targets, timestamps = open_for_update(_SHARED['output_dir'])
+    machine_ids = [machine_id for machine_id, _, _ in shard]
+    frames = iter_machine_frames(_SHARED['dataset_dir'], machine_ids=machine_ids)
+    for (machine_id, lo, hi), (_, group) in zip(shard, frames):
+        if len(group) != hi - lo:
+            raise ValueError(f"Machine {machine_id} has {len(group)} rows, "
+                             f"{hi - lo} were reserved")
+        features[lo:hi] = scaler.transform(group[columns])
+        targets[lo:hi] = group['needs_maintenance'].values
+        timestamps[lo:hi] = group['timestamp'].values
+    for array in (features, targets, timestamps):
+        array.flush()
+    return len(shard)
+
+def preprocess_and_save_sequences(dataset_dir=DATASET_DIR, output_dir=SEQUENCE_STORE_DIR,
+                                  time_steps=TIME_STEPS, n_jobs=1, scaler_path=SCALER_PATH):
+    """Normalize each machine's features into a memory-mapped sequence store
+
+    Works out of core: the scaler is fitted over streamed chunks, then each
+    machine's partition is read, normalized and written on its own, so peak
+    memory is one chunk or one machine rather than the dataset plus copies.
+    Every machine's row range is reserved up front in machine_id order, so
+    the layout is the same for any ``n_jobs``; with ``n_jobs > 1`` contiguous
+    shards of machines are filled by a forked process pool. Windows are not
+    materialized; they are gathered from the store batch by batch.
+    """
+    columns = feature_columns(dataset_columns(dataset_dir))
+    scaler = fit_scaler(dataset_dir, columns, scaler_path=scaler_path)
     
-    # Process each machine separately
-    machine_groups = df.groupby('machine_id')
-    seq_files = []
+    # Size the store from the Parquet metadata and reserve each machine's rows
+    row_counts = machine_row_counts(dataset_dir)
+    store = SequenceStoreWriter(output_dir, sum(row_counts.values()), columns, time_steps)
+    machines = [
+        (machine_id, *store.reserve(machine_id, n_rows))
+        for machine_id, n_rows in row_counts.items()
+    ]
+    n_shards = min(len(machines), max(1, n_jobs) * 4)
+    shards = [
+        [machines[i] for i in shard]
+        for shard in np.array_split(np.arange(len(machines)), n_shards)
+    ]
     
-    for i, (machine_id, group) in enumerate(machine_groups):
-        # Process features
-        machine_features = group.drop(
-            columns=['needs_maintenance', 'machine_id', 'timestamp']
-        ).values
-        machine_target = group['needs_maintenance'].values
-        
-        # Normalize
-        machine_features = scaler.transform(machine_features)
-        
-        # Create sequences
-        time_steps = 24
-        X_seq = []
-        y_seq = []
-        
-        for j in range(len(machine_features) - time_steps):
-            X_seq.append(machine_features[j:j+time_steps])
-            y_seq.append(machine_target[j+time_steps])
-        
-        # Save to disk
-        seq_file = f"{output_dir}/machine_{machine_id}_seq.npz"
-        np.savez(seq_file, X=np.array(X_seq), y=np.array(y_seq))
-        seq_files.append(seq_file)
-        
-        # Clear memory
-        del X_seq, y_seq
-        gc.collect()
-        
-        if (i+1) % 100 == 0:
-            logging.info(f"Processed {i+1}/{len(machine_groups)} machines")
+    _SHARED.update(dataset_dir=dataset_dir, output_dir=output_dir, scaler=scaler, columns=columns)
+    try:
+        done = 0
+        if n_jobs > 1 and len(shards) > 1:
+            logging.info(f"Writing {len(machines)} machines in {len(shards)} shards "
+                         f"on {n_jobs} processes")
+            context = multiprocessing.get_context('fork')
+            with ProcessPoolExecutor(max_workers=n_jobs, mp_context=context) as executor:
+                futures = [executor.submit(_write_machine_shard, shard) for shard in shards]
+                for future in as_completed(futures):
+                    done += future.result()
+                    logging.info(f"Processed {done}/{len(machines)} machines")
+        else:
+            for shard in shards:
+                done += _write_machine_shard(shard)
+                logging.info(f"Processed {done}/{len(machines)} machines")
+    finally:
+        _SHARED.clear()
     
-    return seq_files
+    store.close()
+    return SequenceStore(output_dir)
 
-def load_sequences(seq_files, sample_fraction=0.1):
-    """Load a fraction of sequences to reduce memory usage"""
-    X_list, y_list = [], []
+def build_sequence_store(dataset_dir=DATASET_DIR, output_dir=SEQUENCE_STORE_DIR, n_jobs=1,
+                         cache=None):
+    """Scaler and sequence store for a dataset, reused from the cache when unchanged
+
+    The cache key covers the dataset files, the window length and the code
+    that normalizes and writes the store, so changes to the model or the
+    training loop never invalidate it.
+    """
+    if cache is None:
+        return preprocess_and_save_sequences(dataset_dir, output_dir, n_jobs=n_jobs)
     
-    for i, file in enumerate(seq_files):
-        if np.random.rand() < sample_fraction:  # Random sampling
-            data = np.load(file)
-            X_list.append(data['X'])
-            y_list.append(data['y'])
-        
-        if (i+1) % 100 == 0:
-            logging.info(f"Loaded {i+1}/{len(seq_files)} sequence files")
+    key = ArtifactCache.key(
+        'sequences',
+        snapshot=directory_snapshot(dataset_dir),
+        config={'time_steps': TIME_STEPS},
+        code=code_version(feature_columns, fit_scaler, _write_machine_shard,
+                          preprocess_and_save_sequences, dataset_store, sequence_store, sequences)
+    )
+    cached = cache.get(key)
+    if cached:
+        link_tree(os.path.join(cached, 'sequences'), output_dir)
+        link_file(os.path.join(cached, 'scaler.joblib'), SCALER_PATH)
+        logging.info(f"Restored {output_dir} and {SCALER_PATH} from {cached}")
+        return SequenceStore(output_dir)
     
-    return np.concatenate(X_list), np.concatenate(y_list)
+    store = preprocess_and_save_sequences(dataset_dir, output_dir, n_jobs=n_jobs)
+    
+    def build_entry(entry):
+        link_tree(output_dir, os.path.join(entry, 'sequences'))
+        link_file(SCALER_PATH, os.path.join(entry, 'scaler.joblib'))
+    cache.put(key, build_entry)
+    return store
 
-def main():
+def main(n_jobs=1, profile='default', batch_size=None, resume=False, seed=42, save_every=500,
+         cache_dir=CACHE_DIR, publish=False):
     try:
         logging.info("Starting memory-optimized training pipeline")
         
-        # 1. Load data in chunks
-        df = load_data_in_chunks('processed_maintenance_prediction_data.csv')
+        # A new run drops the previous run's checkpoints and config up front,
+        # so a --resume after it crashes early cannot pick up the old run
+        if not resume:
+            clear_training_state(STATE_DIR)
+            if os.path.exists(TRAINING_CONFIG_PATH):
+                os.remove(TRAINING_CONFIG_PATH)
         
-        # 2. Preprocess and save sequences
-        seq_files = preprocess_and_save_sequences(df)
+        # Configure the runtime before TensorFlow runs anything; a resumed run
+        # keeps the config it started with so its batches line up
+        if resume and os.path.exists(TRAINING_CONFIG_PATH):
+            config = load_config(TRAINING_CONFIG_PATH)
+            seed = config.get('seed', seed)
+        else:
+            config = resolve_profile(profile, batch_size)
+        apply_profile(config)
         
-        # 3. Load subset of sequences
-        X, y = load_sequences(seq_files, sample_fraction=0.3)  # Use 30% of data
-        logging.info(f"Final sequences loaded. X shape: {X.shape}, y shape: {y.shape}")
+        # 1-2. Fit the scaler and write normalized sequences, streaming the dataset;
+        # a resumed run reuses the finished store of the interrupted one, and
+        # an unchanged dataset reuses the cached store
+        if resume and os.path.exists(os.path.join(SEQUENCE_STORE_DIR, INDEX_FILE)):
+            store = SequenceStore(SEQUENCE_STORE_DIR)
+            logging.info(f"Reusing sequence store {SEQUENCE_STORE_DIR}")
+        else:
+            cache = ArtifactCache(cache_dir) if cache_dir else None
+            store = build_sequence_store(DATASET_DIR, n_jobs=n_jobs, cache=cache)
         
-        # 4. Split data
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, shuffle=False
+        # 3. Initialize model with smaller architecture
+        tf.keras.utils.set_random_seed(seed)
+        model = MaintenanceLSTM(
+            (store.time_steps, store.n_features),
+            learning_rate=config['learning_rate'],
+            jit_compile=config['jit_compile'],
+            unroll=config['unroll'],
+            lstm_implementation=config['lstm_implementation']
         )
         
-        # 5. Initialize model with smaller architecture
-        input_shape = (X_train.shape[1], X_train.shape[2])
-        model = MaintenanceLSTM(input_shape)
+        # 4. Restore weights, optimizer and data cursor of an interrupted run
+        state = TrainingState(model.model, STATE_DIR, seed=seed)
+        if not (resume and state.restore()):
+            config['seed'] = seed
+            save_config(config, TRAINING_CONFIG_PATH)
+        batches_per_epoch = count_batches(store, TRAIN_SPLIT, config['batch_size'])
+        initial_epoch, skip_batches = state.cursor(batches_per_epoch)
+        
+        # 5. Stream every machine's windows from the store, split in time order
+        val_data = make_window_dataset(store, VALIDATION_SPLIT, batch_size=config['batch_size'],
+                                       shuffle=False)
+        logging.info(f"Streaming {count_windows(store, TRAIN_SPLIT)} training and "
+                     f"{count_windows(store, VALIDATION_SPLIT)} validation windows "
+                     f"from {len(store.machines)} machines")
         
-        # 6. Train with checkpointing
+        # 6. Train with best-model and resumable checkpoints
         checkpoint = ModelCheckpoint(
             'model/lstm_checkpoint.h5',
             save_best_only=True,
             monitor='val_loss'
         )
-        
-        history = model.model.fit(
-            X_train, y_train,
-            validation_split=0.2,
-            epochs=20,
-            batch_size=64,
-            callbacks=[checkpoint],
+        checkpoint.best = float(state.best_val_loss.numpy())
+        fit_args = dict(
+            validation_data=val_data,
+            callbacks=[checkpoint, TrainingStateCheckpoint(state, save_every)],
             verbose=1
         )
         
-        # 7. Save final model
+        # Each epoch's batches follow from (seed, epoch), so the run picks up
+        # at the batch after the last checkpointed one
+        if skip_batches and initial_epoch < EPOCHS:
+            # Finish the interrupted epoch on its own, as it is shorter
+            rest_of_epoch = make_window_dataset(
+                store, TRAIN_SPLIT, batch_size=config['batch_size'], seed=seed,
+                epochs=initial_epoch + 1, initial_epoch=initial_epoch, skip_batches=skip_batches
+            )
+            model.model.fit(rest_of_epoch, epochs=initial_epoch + 1, initial_epoch=initial_epoch,
+                            steps_per_epoch=batches_per_epoch - skip_batches, **fit_args)
+            initial_epoch += 1
+        
+        if initial_epoch < EPOCHS:
+            train_data = make_window_dataset(
+                store, TRAIN_SPLIT, batch_size=config['batch_size'], seed=seed,
+                epochs=EPOCHS, initial_epoch=initial_epoch
+            )
+            model.model.fit(train_data, epochs=EPOCHS, initial_epoch=initial_epoch,
+                            steps_per_epoch=batches_per_epoch, **fit_args)
+        
+        # 7. Save final model, plus the NumPy export the service loads
         model.save('model/lstm_maintenance_final.h5')
+        export_numpy_model(model.model, 'model/lstm_maintenance_final.npz')
+        if publish:
+            publish_model(model.model, SCALER_PATH, store.feature_columns, store.time_steps,
+                          h5_path='model/lstm_maintenance_final.h5',
+                          metrics={'best_val_loss': float(state.best_val_loss.numpy())})
 
-        # 8 Save training history
+        # 8. Save training history, including epochs from before a resume
         os.makedirs('ml_model', exist_ok=True)
         with open('ml_model/training_history.pkl', 'wb') as f:
-            pickle.dump(history.history, f)
+            pickle.dump(state.history, f)
         
         logging.info("Training completed successfully")
         
@@ -151,4 +303,26 @@ def main():
 
 if __name__ == "__main__":
     os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Train the maintenance LSTM')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='Processes used to write the sequence store')
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='default',
+                        help='Training profile; "cpu" tunes threads, batch size and LSTM unrolling')
+    parser.add_argument('--batch-size', type=int, default=None,
+                        help="Override the profile's batch size; the learning rate follows it")
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue the interrupted run from its latest training state')
+    parser.add_argument('--seed', type=int, default=42,
+                        help='Seed for the epoch order and random ops of a new run')
+    parser.add_argument('--save-every', type=int, default=500,
+                        help='Batches between training state checkpoints')
+    parser.add_argument('--cache-dir', default=CACHE_DIR,
+                        help='Artifact cache; an unchanged dataset reuses its cached sequences')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Always rebuild the sequences, and do not cache them')
+    parser.add_argument('--publish', action='store_true',
+                        help='Publish the trained model as the next version in the model registry')
+    args = parser.parse_args()
+    main(n_jobs=args.jobs, profile=args.profile, batch_size=args.batch_size,
+         resume=args.resume, seed=args.seed, save_every=args.save_every,
+         cache_dir=None if args.no_cache else args.cache_dir, publish=args.publish)
\ No newline at end of file
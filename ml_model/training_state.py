@@ -0,0 +1,119 @@
+# training_state.py
+import os
+import json
+import shutil
+import logging
+import numpy as np
+import tensorflow as tf
+
+STATE_DIR = 'model/training_state'
+HISTORY_FILE = 'history.json'
+
+
+def clear_training_state(directory=STATE_DIR):
+    """Remove a previous run's checkpoints, so a new run can never resume from them"""
+    if os.path.exists(directory):
+        logging.info(f"Removing the training state of the previous run in {directory}")
+        shutil.rmtree(directory)
+
+
+class TrainingState:
+    """Everything needed to continue an interrupted training run where it stopped
+
+    Wraps a ``tf.train.Checkpoint`` of the model weights (including the
+    BatchNorm statistics), the optimizer with its slots and iteration count,
+    and the training cursor: the epoch, the batches of it already trained on,
+    the run's seed and the best validation loss so far. Together with the
+    seeded epoch order of ``make_window_dataset`` this pins down the data
+    still to come. The history of finished epochs is kept alongside.
+
+    Keras does not checkpoint the state of its dropout kernels, so dropout
+    masks after a resume differ from those of an uninterrupted run; every
+    other input to the next step is restored exactly.
+    """
+
+    def __init__(self, model, directory=STATE_DIR, seed=42, max_to_keep=2):
+        self.directory = directory
+        self.model = model
+        self.optimizer = model.optimizer
+        self.epoch = tf.Variable(0, dtype=tf.int64, trainable=False)
+        self.step = tf.Variable(0, dtype=tf.int64, trainable=False)
+        self.seed = tf.Variable(seed, dtype=tf.int64, trainable=False)
+        self.best_val_loss = tf.Variable(np.inf, dtype=tf.float64, trainable=False)
+        self.checkpoint = tf.train.Checkpoint(
+            model=model,
+            optimizer=model.optimizer,
+            epoch=self.epoch,
+            step=self.step,
+            seed=self.seed,
+            best_val_loss=self.best_val_loss
+        )
+        self.manager = tf.train.CheckpointManager(self.checkpoint, directory, max_to_keep)
+        self.history = {}
+
+    def restore(self):
+        """Restore the latest checkpoint if there is one; return whether it did"""
+        path = self.manager.latest_checkpoint
+        if path is None:
+            return False
+        # Create the optimizer slots first so they are restored now, not on first use
+        self.optimizer.build(self.model.trainable_variables)
+        self.checkpoint.restore(path).assert_existing_objects_matched()
+        history_path = os.path.join(self.directory, HISTORY_FILE)
+        if os.path.exists(history_path):
+            with open(history_path) as f:
+                self.history = json.load(f)
+        logging.info(f"Resuming from {path}: epoch {int(self.epoch.numpy()) + 1}, "
+                     f"{int(self.step.numpy())} batches done")
+        return True
+
+    def cursor(self, batches_per_epoch):
+        """(epoch, batches to skip) to resume from
+
+        A run stopped after its last batch but before the epoch was closed
+        continues with the next epoch rather than an empty one.
+        """
+        epoch, step = int(self.epoch.numpy()), int(self.step.numpy())
+        if step >= batches_per_epoch:
+            return epoch + 1, 0
+        return epoch, step
+
+    def save(self):
+        path = self.manager.save()
+        with open(os.path.join(self.directory, HISTORY_FILE), 'w') as f:
+            json.dump(self.history, f)
+        return path
+
+
+class TrainingStateCheckpoint(tf.keras.callbacks.Callback):
+    """Keep a TrainingState current during fit and save it periodically
+
+    Saves every ``save_every`` batches and at the end of every epoch.
+    """
+
+    def __init__(self, state, save_every=500):
+        super().__init__()
+        self.state = state
+        self.save_every = save_every
+        self.offset = 0
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self.state.epoch.assign(epoch)
+        self.offset = int(self.state.step.numpy())
+
+    def on_train_batch_end(self, batch, logs=None):
+        step = self.offset + batch + 1
+        self.state.step.assign(step)
+        if self.save_every and step % self.save_every == 0:
+            self.state.save()
+
+    def on_epoch_end(self, epoch, logs=None):
+        logs = logs or {}
+        for key, value in logs.items():
+            self.state.history.setdefault(key, []).append(float(value))
+        if 'val_loss' in logs:
+            self.state.best_val_loss.assign(min(float(self.state.best_val_loss.numpy()),
+                                                float(logs['val_loss'])))
+        self.state.epoch.assign(epoch + 1)
+        self.state.step.assign(0)
+        self.state.save()
@@ -2,6 +2,10 @@ from flask import Flask
 from flask_cors import CORS
 from routes.simulation import simulation_bp
 from routes.dashboard import dashboard_bp
+from routes.health import health_bp
+from routes.model_admin import model_admin_bp
+from models.loader import model_loader
+import config
 
 app = Flask(__name__)
 
@@ -20,6 +24,14 @@ CORS(app, resources={
 # Register blueprints
 app.register_blueprint(simulation_bp, url_prefix='/api/simulation')
 app.register_blueprint(dashboard_bp, url_prefix='/api/dashboard')
+app.register_blueprint(health_bp, url_prefix='/api/health')
+app.register_blueprint(model_admin_bp, url_prefix='/api/models')
+
+# Load the model without holding up startup; /api/health/ready reports when it is in
+if config.MODEL_LOADING == 'eager':
+    model_loader.load()
+elif config.MODEL_LOADING == 'background':
+    model_loader.start()
 
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
@@ -0,0 +1,60 @@
+import json
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from models.maintenance_predictor import MaintenancePredictor
+
+
+def percentiles(call, repeats):
+    """p50/p99 milliseconds of call() after a few warm-up calls"""
+    for _ in range(5):
+        call()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        call()
+        times.append(time.perf_counter() - start)
+    return {
+        'p50_ms': float(np.percentile(times, 50) * 1e3),
+        'p99_ms': float(np.percentile(times, 99) * 1e3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-call latency of the single-prediction paths')
+    parser.add_argument('--model', required=True, help='Exported .npz or Keras .h5 model')
+    parser.add_argument('--repeats', type=int, default=500)
+    parser.add_argument('--output', default=None, help='Write the JSON report here')
+    args = parser.parse_args()
+
+    predictor = MaintenancePredictor(args.model)
+    rng = np.random.default_rng(0)
+    window = rng.normal(size=predictor.input_shape).astype(np.float32)
+    readings = iter(rng.normal(size=(args.repeats + 5, predictor.input_shape[1])).astype(np.float32))
+
+    # The route path before: model.predict on a batch of one, wrapped in a DataFrame
+    def baseline():
+        predictions = predictor.model.predict(window[None], **(
+            {} if args.model.endswith('.npz') else {'verbose': 0}
+        ))
+        return pd.DataFrame(predictions, columns=['prediction']).to_dict(orient='records')[0]
+
+    paths = {
+        'model.predict + DataFrame': baseline,
+        'predict (micro-batched)': lambda: predictor.predict(window[None]),
+        'predict_window': lambda: predictor.predict_window(window),
+        'predict_reading': lambda: predictor.predict_reading('benchmark', next(readings))
+    }
+    report = {name: percentiles(call, args.repeats) for name, call in paths.items()}
+
+    print(f"{'path':<28} {'p50 ms':>9} {'p99 ms':>9}")
+    for name, stats in report.items():
+        print(f"{name:<28} {stats['p50_ms']:9.3f} {stats['p99_ms']:9.3f}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+import os
+from dotenv import load_dotenv
+
+SERVICE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Values from service/.env, real environment variables take precedence
+load_dotenv(os.path.join(SERVICE_DIR, '.env'))
+
+
+def service_path(path):
+    """Relative paths in the environment are relative to service/, not the working directory"""
+    if not path or os.path.isabs(path):
+        return path
+    return os.path.normpath(os.path.join(SERVICE_DIR, path))
+
+
+# Versioned model registry written by ml_model/model_registry.py; when set,
+# MODEL_VERSION ('latest' or e.g. 'v0003') is served from it instead of MODEL_PATH
+MODEL_REGISTRY = service_path(os.getenv('MODEL_REGISTRY', ''))
+MODEL_VERSION = os.getenv('MODEL_VERSION', 'latest')
+# A registry version scored in the background next to the served one
+SHADOW_MODEL_VERSION = os.getenv('SHADOW_MODEL_VERSION', '')
+# Grace period for requests still on a replaced model before it is shut down
+MODEL_RETIRE_SECONDS = float(os.getenv('MODEL_RETIRE_SECONDS', '30'))
+# Bearer token for activating and shadowing versions over /api/models; unset
+# disables those endpoints
+MODEL_ADMIN_TOKEN = os.getenv('MODEL_ADMIN_TOKEN', '')
+
+# Model artifact: an exported .npz (NumPy engine) or a Keras .h5; a missing
+# .npz falls back to the .h5 next to it
+MODEL_PATH = service_path(os.getenv('MODEL_PATH', '../ml_model/model/lstm_maintenance_final.npz'))
+# 'background' loads at startup without blocking, 'lazy' on the first prediction,
+# 'eager' before the app starts serving
+MODEL_LOADING = os.getenv('MODEL_LOADING', 'background')
+# How long a prediction request waits for a model that is still loading
+MODEL_WAIT_SECONDS = float(os.getenv('MODEL_WAIT_SECONDS', '30'))
+
+PREDICT_MAX_BATCH = int(os.getenv('PREDICT_MAX_BATCH', '64'))
+PREDICT_MAX_WAIT_MS = float(os.getenv('PREDICT_MAX_WAIT_MS', '5'))
+# 0 resyncs streams once per window length
+STREAM_RESYNC_EVERY = int(os.getenv('STREAM_RESYNC_EVERY', '0')) or None
@@ -0,0 +1,115 @@
+import queue
+import logging
+import threading
+import time
+from concurrent.futures import Future
+import numpy as np
+
+
+class MicroBatcher:
+    """Coalesce concurrent prediction requests into batched forward passes
+
+    Callers ``submit`` arrays of windows and get a Future back. A single
+    worker thread takes the first pending request together with the others
+    already queued (waiting up to ``max_wait_ms`` for more only when there
+    are some), up to ``max_batch`` windows, runs one ``predict_fn`` call per
+    window shape and hands every caller its own rows.
+    """
+
+    def __init__(self, predict_fn, max_batch=64, max_wait_ms=5.0):
+        self.predict_fn = predict_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.requests = queue.Queue()
+        self.closed = False
+        # Makes the closed check and the enqueue atomic against close()
+        self.lock = threading.Lock()
+        self.worker = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self.worker.start()
+
+    def submit(self, windows):
+        """Queue (n, time, features) windows, the Future resolves to their (n, 1) predictions"""
+        windows = np.asarray(windows, dtype=np.float32)
+        future = Future()
+        with self.lock:
+            if self.closed:
+                raise RuntimeError("MicroBatcher is closed")
+            self.requests.put((windows, future))
+        return future
+
+    def close(self):
+        """Stop the worker once the queued requests are served"""
+        with self.lock:
+            if not self.closed:
+                self.closed = True
+                self.requests.put(None)
+        self.worker.join()
+
+    def _collect(self):
+        """Block for one request, then gather the others that are pending
+
+        A request that arrives to an empty queue is served at once, so a
+        lone caller never pays ``max_wait_ms``. Only when other requests
+        were queued with it, i.e. callers are actually concurrent, does the
+        worker wait up to ``max_wait_ms`` for more to fill the batch.
+        """
+        first = self.requests.get()
+        if first is None:
+            return None
+        batch = [first]
+        size = len(first[0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch:
+            try:
+                item = self.requests.get_nowait()
+            except queue.Empty:
+                remaining = deadline - time.monotonic()
+                if len(batch) == 1 or remaining <= 0:
+                    break
+                try:
+                    item = self.requests.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if item is None:
+                # Serve what we have, then let the next _collect see the stop
+                self.requests.put(None)
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                self._fail_pending()
+                return
+            # Windows of different lengths cannot share a forward pass
+            by_shape = {}
+            for windows, future in batch:
+                by_shape.setdefault(windows.shape[1:], []).append((windows, future))
+            for group in by_shape.values():
+                self._predict_group(group)
+
+    def _predict_group(self, group):
+        try:
+            predictions = np.asarray(self.predict_fn(np.concatenate([w for w, _ in group])))
+        except Exception as e:
+            logging.error(f"Batched prediction failed: {str(e)}")
+            for _, future in group:
+                future.set_exception(e)
+            return
+        offset = 0
+        for windows, future in group:
+            future.set_result(predictions[offset:offset + len(windows)])
+            offset += len(windows)
+
+    def _fail_pending(self):
+        """Fail whatever is still queued at shutdown so no caller waits forever"""
+        while True:
+            try:
+                item = self.requests.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None:
+                item[1].set_exception(RuntimeError("MicroBatcher is closed"))
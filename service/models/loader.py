@@ -0,0 +1,181 @@
+import os
+import time
+import logging
+import threading
+import config
+from models import registry
+from models.shadow import ShadowScorer, ShadowPredictor
+
+
+class ModelNotReady(Exception):
+    """The predictor is still loading, or failed to load"""
+
+
+class ModelLoader:
+    """Build the predictor off the request path, report readiness and hot-swap versions
+
+    ``start`` loads in a background thread so the app (and the routes that
+    need no model) serves immediately; ``get`` starts the load on first use
+    when nothing started it and waits up to ``timeout`` for it to finish.
+
+    ``activate`` loads and warms up another version in the background, then
+    replaces the predictor in one assignment: requests that already hold the
+    old predictor finish on it, it keeps serving until the swap, and live
+    streams carry their windows over. With ``shadow=True`` the version is
+    instead scored next to the primary and the deltas are logged; activating
+    without a version promotes the shadow, or reloads MODEL_VERSION.
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.predictor = None
+        self.scorer = None
+        self.error = None
+        self.load_seconds = None
+        self.swap = {'status': 'idle'}
+        self.thread = None
+        self.lock = threading.Lock()
+        self.swap_lock = threading.Lock()
+        self.ready = threading.Event()
+
+    def load(self):
+        """Build and warm up the predictor in the calling thread"""
+        start = time.perf_counter()
+        try:
+            self.predictor = self.factory(None)
+            self.load_seconds = time.perf_counter() - start
+            logging.info(f"Model {self.predictor.version} loaded in {self.load_seconds:.2f}s")
+        except Exception as e:
+            self.error = e
+            logging.error(f"Error loading model: {str(e)}")
+        finally:
+            self.ready.set()
+        if self.predictor is not None and config.SHADOW_MODEL_VERSION:
+            self.activate(config.SHADOW_MODEL_VERSION, shadow=True)
+
+    def start(self):
+        """Begin loading in a background thread, once"""
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.load, name='model-loader', daemon=True)
+                self.thread.start()
+
+    def get(self, timeout=None):
+        """The loaded predictor, raising ModelNotReady if it is not there in time"""
+        if not self.ready.is_set():
+            self.start()
+            self.ready.wait(config.MODEL_WAIT_SECONDS if timeout is None else timeout)
+        if self.error is not None:
+            raise ModelNotReady(f"Model failed to load: {self.error}")
+        predictor, scorer = self.predictor, self.scorer
+        if predictor is None:
+            raise ModelNotReady("Model is still loading")
+        return ShadowPredictor(predictor, scorer) if scorer else predictor
+
+    def activate(self, version=None, shadow=False):
+        """Load a version in the background and swap it in (or shadow it); False if busy"""
+        if not self.swap_lock.acquire(blocking=False):
+            return False
+        self.swap = {'status': 'loading', 'version': version, 'shadow': shadow}
+        threading.Thread(target=self._activate, args=(version, shadow),
+                         name='model-swap', daemon=True).start()
+        return True
+
+    def _activate(self, version, shadow):
+        try:
+            scorer = self.scorer
+            promote = (not shadow and scorer is not None
+                       and version in (scorer.predictor.version, None))
+            if promote:
+                # The shadow is already warm; drop its queued work first so
+                # none of it touches the streams once it serves
+                self.scorer = None
+                scorer.close()
+                candidate = scorer.predictor
+            else:
+                candidate = self.factory(version)
+            old = self.predictor
+            if old is not None:
+                candidate.streaming.adopt(old.streaming)
+
+            if shadow:
+                self.scorer = ShadowScorer(candidate)
+                if scorer is not None:
+                    scorer.close()
+                    self._retire(scorer.predictor)
+            else:
+                self.predictor = candidate
+                if old is not None:
+                    self._retire(old)
+            self.error = None
+            self.ready.set()
+            self.swap = {'status': 'idle', 'last': candidate.version, 'shadow': shadow}
+            logging.info(f"Model {candidate.version} is now "
+                         f"{'shadowing' if shadow else 'serving'}")
+        except Exception as e:
+            self.swap = {'status': 'failed', 'version': version, 'error': str(e)}
+            logging.error(f"Error activating model {version}: {str(e)}")
+        finally:
+            self.swap_lock.release()
+
+    def stop_shadow(self):
+        scorer, self.scorer = self.scorer, None
+        if scorer:
+            scorer.close()
+            self._retire(scorer.predictor)
+
+    def _retire(self, predictor):
+        """Stop an old predictor's batcher once in-flight requests have had time to finish"""
+        timer = threading.Timer(config.MODEL_RETIRE_SECONDS, predictor.close)
+        timer.daemon = True
+        timer.start()
+
+    def status(self):
+        if self.error is not None:
+            state = 'failed'
+        elif self.predictor is not None:
+            state = 'ready'
+        elif self.thread is not None:
+            state = 'loading'
+        else:
+            state = 'not_loaded'
+        return {
+            'status': state,
+            'version': self.predictor.version if self.predictor else None,
+            'load_seconds': self.load_seconds,
+            'error': str(self.error) if self.error is not None else None,
+            'swap': self.swap,
+            'shadow': self.scorer.stats() if self.scorer else None
+        }
+
+
+def load_predictor(version=None):
+    """MaintenancePredictor configured from the environment, warmed up
+
+    With MODEL_REGISTRY set, ``version`` (default MODEL_VERSION) is looked
+    up there with its scaler and feature schema; otherwise MODEL_PATH is
+    loaded as is.
+    """
+    from models.maintenance_predictor import MaintenancePredictor
+    options = dict(
+        max_batch=config.PREDICT_MAX_BATCH,
+        max_wait_ms=config.PREDICT_MAX_WAIT_MS,
+        resync_every=config.STREAM_RESYNC_EVERY
+    )
+    if config.MODEL_REGISTRY:
+        info = registry.load_version(config.MODEL_REGISTRY, version or config.MODEL_VERSION)
+        return MaintenancePredictor(info['model_path'], scaler_path=info['scaler_path'],
+                                    schema=info['schema'], version=info['version'], **options)
+    if version:
+        raise ValueError("Model versions need MODEL_REGISTRY to be configured")
+    model_path = config.MODEL_PATH
+    if model_path.endswith('.npz') and not os.path.exists(model_path):
+        fallback = model_path[:-len('.npz')] + '.h5'
+        if os.path.exists(fallback):
+            logging.warning(f"{model_path} not found, loading {fallback} with TensorFlow; "
+                            f"export it with ml_model/export_numpy_model.py")
+            model_path = fallback
+    return MaintenancePredictor(model_path, version=os.path.basename(model_path), **options)
+
+
+model_loader = ModelLoader(load_predictor)
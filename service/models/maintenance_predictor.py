@@ -1,13 +1,105 @@
-from tensorflow.keras.models import load_model
+import numpy as np
 import pandas as pd
+from models.numpy_lstm import NumpyLSTM
+from models.batching import MicroBatcher
+from models.streaming import StreamingPredictor
+
+# Input columns, in order, of a model loaded without a feature schema (MODEL_PATH)
+DEFAULT_FEATURE_COLUMNS = [
+    'temperature', 'vibration', 'load', 'cycle_time', 'power_consumption',
+    'feature_6', 'feature_7', 'feature_8', 'feature_9', 'feature_10',
+    'feature_11', 'feature_12', 'feature_13', 'feature_14', 'feature_15',
+    'feature_16', 'feature_17', 'feature_18', 'feature_19', 'feature_20',
+    'feature_21', 'feature_22', 'feature_23', 'feature_24', 'feature_25',
+    'feature_26', 'feature_27', 'feature_28'
+]
 
 class MaintenancePredictor:
-    def __init__(self, model_path='/home/zven/Projects/PFE/ml_model/model/lstm_maintenance_final.h5'):
-        self.model = load_model(model_path, compile=False)
+    def __init__(self, model_path, max_batch=64, max_wait_ms=5.0, resync_every=None,
+                 scaler_path=None, schema=None, version=None):
+        self.version = version
+        self.schema = schema
+        if model_path.endswith('.npz'):
+            # Exported weights: NumPy-only forward pass, TensorFlow is never imported
+            self.model = NumpyLSTM(model_path)
+            predict_fn = self.model.predict
+            self.input_shape = self.model.input_shape
+        else:
+            import tensorflow as tf
+            from tensorflow.keras.models import load_model
+            self.model = load_model(model_path, compile=False)
+            self.input_shape = tuple(self.model.input_shape[1:])
+            # Traced once for any batch size and window length (streams start
+            # with partial windows), skipping predict()'s per-call data adapter
+            # and batching loop
+            forward = tf.function(
+                lambda X: self.model(X, training=False),
+                input_signature=[tf.TensorSpec((None, None, self.input_shape[1]), tf.float32)]
+            )
+            predict_fn = lambda X: forward(np.asarray(X, dtype=np.float32)).numpy()
+        # A published model's schema says which columns it reads, in which order
+        self.feature_columns = list(schema['feature_columns']) if schema else DEFAULT_FEATURE_COLUMNS
+        if schema and list(self.input_shape) != [schema['time_steps'], len(self.feature_columns)]:
+            raise ValueError(f"Model input {self.input_shape} does not match its feature schema")
+
+        # Inputs are raw readings; the scaler statistics published with the
+        # model (plain arrays, no sklearn pickle) normalize them
+        self.mean = self.scale = None
+        if scaler_path:
+            with np.load(scaler_path) as scaler:
+                self.mean = scaler['mean'].astype(np.float32)
+                self.scale = scaler['scale'].astype(np.float32)
+
+        time_steps = self.input_shape[0]
+        self.predict_fn = predict_fn
+        self.warm_up()
+        # Concurrent requests share one forward pass instead of one call each
+        self.batcher = MicroBatcher(predict_fn, max_batch=max_batch, max_wait_ms=max_wait_ms)
+        # Live readings advance per-machine LSTM state instead of re-running the window
+        self.streaming = StreamingPredictor(self.model, time_steps, resync_every, predict_fn,
+                                            normalize=self.normalize)
+
+    def warm_up(self):
+        """Run one prediction so the first request does not pay for tracing or BLAS setup."""
+        self.predict_fn(np.zeros((1,) + self.input_shape, dtype=np.float32))
+
+    def normalize(self, data):
+        """Apply the model's scaler, if it has one, over the feature axis."""
+        data = np.asarray(data, dtype=np.float32)
+        if self.mean is None:
+            return data
+        return (data - self.mean) / self.scale
 
     def predict(self, data: pd.DataFrame):
         """Run predictions on the input data."""
-        # Preprocess data (implement preprocessing logic here)
-        # For now, assume data is ready for prediction
-        predictions = self.model.predict(data)
+        predictions = self.batcher.submit(self.normalize(data)).result()
         return pd.DataFrame(predictions, columns=['prediction'])
+
+    def predict_window(self, window):
+        """Probability for one (time, features) window, as a plain float."""
+        # Straight to the model: no queue hop, batching wait or DataFrame
+        return float(self.predict_fn(self.normalize(window)[None])[0, 0])
+
+    def features(self, record):
+        """Model input (n_features,) from a reading's columns, in this model's feature order.
+
+        Columns the reading lacks, or that are not numeric, are 0.
+        """
+        df = pd.DataFrame([record]).reindex(columns=self.feature_columns)
+        return df.apply(pd.to_numeric, errors='coerce').fillna(0).to_numpy(dtype=np.float32)[0]
+
+    def predict_reading(self, key, reading):
+        """Probability after one new reading (n_features,) of the stream identified by key."""
+        return self.streaming.update(key, reading)
+
+    def predict_record(self, key, record):
+        """Probability after one new reading given as a dict of its columns."""
+        return self.predict_reading(key, self.features(record))
+
+    def reset_stream(self, key=None):
+        """Start a stream (or all streams) over from an empty window."""
+        self.streaming.reset(key)
+
+    def close(self):
+        """Serve what is queued, then stop the batching thread."""
+        self.batcher.close()
@@ -0,0 +1,119 @@
+import json
+import numpy as np
+
+SUPPORTED_FORMAT = 1
+
+
+def sigmoid(x):
+    return 0.5 * (np.tanh(0.5 * x) + 1.0)
+
+
+ACTIVATIONS = {
+    'linear': lambda x: x,
+    'relu': lambda x: np.maximum(x, 0.0),
+    'sigmoid': sigmoid,
+    'tanh': np.tanh
+}
+
+
+def dequantize(arrays, weights):
+    """Float32 weights from an artifact stored as float32, float16 or int8"""
+    if weights == 'int8':
+        return {
+            key: value.astype(np.float32) * arrays[f'{key}_scale']
+            if value.dtype == np.int8 else value
+            for key, value in arrays.items() if not key.endswith('_scale')
+        }
+    return {key: value.astype(np.float32) for key, value in arrays.items()}
+
+
+class NumpyLSTM:
+    """Forward pass of an exported LSTM/Dense stack using only NumPy
+
+    Loads the ``.npz`` written by ``ml_model/export_numpy_model.py``, where
+    BatchNormalization is already folded into the weights, so inference
+    needs neither TensorFlow nor its startup time and memory. float16 and
+    int8 artifacts are expanded to float32 once at load: they shrink the
+    file, while the forward pass keeps float32 BLAS speed.
+    """
+
+    def __init__(self, path):
+        with np.load(path) as artifact:
+            self.spec = json.loads(str(artifact['spec']))
+            arrays = {key: artifact[key] for key in artifact.files if key != 'spec'}
+        if self.spec['format'] != SUPPORTED_FORMAT:
+            raise ValueError(f"Unsupported model format {self.spec['format']} in {path}")
+        self.weights = dequantize(arrays, self.spec.get('weights', 'float32'))
+        self.input_shape = tuple(self.spec['input_shape'])
+        self.layers = self.spec['layers']
+        for layer in self.layers:
+            if layer['type'] == 'lstm':
+                self._halve_sigmoid_gates(layer['name'], layer['units'])
+
+    def _halve_sigmoid_gates(self, name, units):
+        """Pre-scale the i, f, o gate columns by 0.5 so one tanh serves all four gates
+
+        sigmoid(z) == 0.5 * tanh(z / 2) + 0.5, so with those pre-activations
+        halved a step needs one tanh over every gate instead of three sigmoids.
+        """
+        scale = np.full(4 * units, 0.5, dtype=np.float32)
+        scale[2 * units:3 * units] = 1.0
+        for part in ('kernel', 'recurrent', 'bias'):
+            self.weights[f'{name}_{part}'] = self.weights[f'{name}_{part}'] * scale
+
+    def lstm(self, x, name, return_sequences, state=None):
+        """Run one LSTM layer over (batch, time, features); gates in Keras order i, f, c, o
+
+        Starts from ``state`` (h, c) or zeros and returns (outputs, final (h, c)).
+        """
+        kernel = self.weights[f'{name}_kernel']
+        recurrent = self.weights[f'{name}_recurrent']
+        bias = self.weights[f'{name}_bias']
+        batch, steps, _ = x.shape
+        units = recurrent.shape[0]
+
+        # Input projections of every time step in one matmul
+        projected = (x.reshape(batch * steps, -1) @ kernel + bias).reshape(batch, steps, 4 * units)
+        if state is None:
+            h = np.zeros((batch, units), dtype=x.dtype)
+            c = np.zeros((batch, units), dtype=x.dtype)
+        else:
+            h, c = state
+        outputs = np.empty((batch, steps, units), dtype=x.dtype) if return_sequences else None
+
+        for t in range(steps):
+            activated = np.tanh(projected[:, t] + h @ recurrent)
+            gates = activated * 0.5 + 0.5
+            i = gates[:, :units]
+            f = gates[:, units:2 * units]
+            g = activated[:, 2 * units:3 * units]
+            o = gates[:, 3 * units:]
+            c = f * c + i * g
+            h = o * np.tanh(c)
+            if return_sequences:
+                outputs[:, t] = h
+        return (outputs if return_sequences else h), (h, c)
+
+    def forward(self, X, states=None):
+        """Probabilities plus the final (h, c) of every LSTM layer
+
+        Passing the returned states back in continues the sequences where
+        they stopped, so a stream can advance one reading at a time.
+        """
+        x = np.asarray(X, dtype=np.float32)
+        new_states = []
+        for layer in self.layers:
+            name = layer['name']
+            if layer['type'] == 'lstm':
+                state = states[len(new_states)] if states is not None else None
+                x, state = self.lstm(x, name, layer['return_sequences'], state)
+                new_states.append(state)
+            else:
+                x = ACTIVATIONS[layer['activation']](
+                    x @ self.weights[f'{name}_kernel'] + self.weights[f'{name}_bias']
+                )
+        return x, new_states
+
+    def predict(self, X):
+        """Probabilities of shape (batch, 1) for windows of shape (batch, time, features)"""
+        return self.forward(X)[0]
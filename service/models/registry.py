@@ -0,0 +1,56 @@
+import os
+import json
+
+# Layout written by ml_model/model_registry.py
+LATEST_FILE = 'LATEST'
+MANIFEST_FILE = 'manifest.json'
+SCALER_FILE = 'scaler.npz'
+
+
+def list_versions(registry_dir):
+    """Published version names, oldest first"""
+    if not os.path.isdir(registry_dir):
+        return []
+    return sorted(
+        name for name in os.listdir(registry_dir)
+        if name.startswith('v') and os.path.exists(os.path.join(registry_dir, name, MANIFEST_FILE))
+    )
+
+
+def resolve_version(registry_dir, version='latest'):
+    """Concrete version name for 'latest' or an explicit version"""
+    if version == 'latest':
+        latest_path = os.path.join(registry_dir, LATEST_FILE)
+        if os.path.exists(latest_path):
+            with open(latest_path) as f:
+                version = f.read().strip()
+        else:
+            versions = list_versions(registry_dir)
+            if not versions:
+                raise FileNotFoundError(f"No published models in {registry_dir}")
+            version = versions[-1]
+    if version not in list_versions(registry_dir):
+        raise FileNotFoundError(f"Model version {version} not found in {registry_dir}")
+    return version
+
+
+def load_version(registry_dir, version='latest'):
+    """Paths, feature schema and manifest of one published version"""
+    version = resolve_version(registry_dir, version)
+    path = os.path.join(registry_dir, version)
+    with open(os.path.join(path, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    with open(os.path.join(path, 'schema.json')) as f:
+        schema = json.load(f)
+    # Prefer the NumPy export so TensorFlow stays out of the service
+    model_path = os.path.join(path, 'model.npz')
+    if not os.path.exists(model_path):
+        model_path = os.path.join(path, 'model.h5')
+    scaler_path = os.path.join(path, SCALER_FILE)
+    return {
+        'version': version,
+        'model_path': model_path,
+        'scaler_path': scaler_path if os.path.exists(scaler_path) else None,
+        'schema': schema,
+        'manifest': manifest
+    }
@@ -0,0 +1,115 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+# Summarize the shadow deltas at INFO level every this many comparisons
+SUMMARY_EVERY = 100
+# Comparisons queued at most; beyond that the shadow is skipped, not the request slowed
+MAX_PENDING = 1000
+
+
+class ShadowScorer:
+    """Score a candidate model on live traffic and log how far it is from the primary
+
+    The candidate runs on a single background thread, off the request path,
+    in the order requests arrived, so its streams see readings in sequence.
+    When it falls more than MAX_PENDING comparisons behind, new ones are
+    dropped and counted instead of queued.
+    """
+
+    def __init__(self, predictor):
+        self.predictor = predictor
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='shadow')
+        self.lock = threading.Lock()
+        self.count = 0
+        self.total_delta = 0.0
+        self.max_delta = 0.0
+        self.pending = 0
+        self.dropped = 0
+
+    def submit(self, primary, score):
+        """Run score() on the shadow model and record its delta from primary"""
+        with self.lock:
+            if self.pending >= MAX_PENDING:
+                self.dropped += 1
+                return
+            self.pending += 1
+        self.run(lambda: self._compare(np.asarray(primary, dtype=np.float64), score))
+
+    def run(self, action):
+        """Run a side effect (e.g. a stream reset) in order with the scoring"""
+        try:
+            self.executor.submit(action)
+        except RuntimeError:
+            # Shadowing stopped while this request was in flight
+            pass
+
+    def _compare(self, primary, score):
+        try:
+            delta = np.abs(np.asarray(score(), dtype=np.float64).reshape(primary.shape) - primary)
+        except Exception as e:
+            logging.error(f"Shadow scoring with {self.predictor.version} failed: {str(e)}")
+            with self.lock:
+                self.pending -= 1
+            return
+        with self.lock:
+            self.pending -= 1
+            self.count += delta.size
+            self.total_delta += float(delta.sum())
+            self.max_delta = max(self.max_delta, float(delta.max()))
+            stats = self.stats()
+        logging.debug(f"Shadow {self.predictor.version} delta {float(delta.max()):.5f}")
+        if stats['count'] // SUMMARY_EVERY != (stats['count'] - delta.size) // SUMMARY_EVERY:
+            logging.info(f"Shadow {self.predictor.version}: {stats['count']} predictions, "
+                         f"mean |delta| {stats['mean_delta']:.5f}, max {stats['max_delta']:.5f}")
+
+    def stats(self):
+        return {
+            'version': self.predictor.version,
+            'count': self.count,
+            'mean_delta': self.total_delta / self.count if self.count else None,
+            'max_delta': self.max_delta,
+            'dropped': self.dropped
+        }
+
+    def close(self):
+        """Stop scoring; queued comparisons are cancelled, not run"""
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+class ShadowPredictor:
+    """The primary predictor's interface and results, mirrored to a ShadowScorer"""
+
+    def __init__(self, primary, scorer):
+        self.primary = primary
+        self.scorer = scorer
+
+    def __getattr__(self, name):
+        return getattr(self.primary, name)
+
+    def predict(self, data):
+        result = self.primary.predict(data)
+        self.scorer.submit(result['prediction'].to_numpy(),
+                           lambda: self.scorer.predictor.predict(data)['prediction'].to_numpy())
+        return result
+
+    def predict_window(self, window):
+        result = self.primary.predict_window(window)
+        self.scorer.submit(result, lambda: self.scorer.predictor.predict_window(window))
+        return result
+
+    def predict_reading(self, key, reading):
+        result = self.primary.predict_reading(key, reading)
+        self.scorer.submit(result, lambda: self.scorer.predictor.predict_reading(key, reading))
+        return result
+
+    def predict_record(self, key, record):
+        # Each model builds its own input from the record, its columns may differ
+        result = self.primary.predict_record(key, record)
+        self.scorer.submit(result, lambda: self.scorer.predictor.predict_record(key, record))
+        return result
+
+    def reset_stream(self, key=None):
+        self.primary.reset_stream(key)
+        self.scorer.run(lambda: self.scorer.predictor.reset_stream(key))
@@ -0,0 +1,91 @@
+import threading
+from collections import deque
+import numpy as np
+
+
+class StreamingPredictor:
+    """Per-machine LSTM state advanced by one step per reading
+
+    Each machine keeps its last ``time_steps`` readings and the (h, c) of
+    every LSTM layer, so a new reading costs one recurrent step instead of
+    a pass over the whole window. Until the window fills, stepping from zero
+    state is exactly the windowed model. After that the carried state also
+    remembers readings older than the window, so every ``resync_every`` steps
+    it is rebuilt from zeros over the true window.
+
+    Models without a stateful ``forward`` (the Keras fallback) are served by
+    running ``predict_fn`` over the buffered window on every reading. Windows
+    keep raw readings and ``normalize`` is applied on the way into the model,
+    so another model version can ``adopt`` them.
+    """
+
+    def __init__(self, model, time_steps, resync_every=None, predict_fn=None, normalize=None):
+        self.model = model
+        self.time_steps = time_steps
+        self.resync_every = resync_every or time_steps
+        self.predict_fn = predict_fn or model.predict
+        self.normalize = normalize or (lambda data: data)
+        self.stateful = hasattr(model, 'forward')
+        self.streams = {}
+        # Guards the streams dict only; each stream's own lock covers its model steps
+        self.lock = threading.Lock()
+
+    def new_stream(self, window=(), since_resync=0):
+        return {
+            'window': deque(window, maxlen=self.time_steps),
+            'states': None,
+            'since_resync': since_resync,
+            'lock': threading.Lock()
+        }
+
+    def reset(self, key=None):
+        """Forget one stream, or every stream when key is None"""
+        with self.lock:
+            if key is None:
+                self.streams.clear()
+            else:
+                self.streams.pop(key, None)
+
+    def update(self, key, reading):
+        """Feed one reading (n_features,) for a stream and return its probability"""
+        reading = np.asarray(reading, dtype=np.float32).reshape(-1)
+        with self.lock:
+            stream = self.streams.get(key)
+            if stream is None:
+                stream = self.streams[key] = self.new_stream()
+        # Readings of one stream are applied in order, different streams run concurrently
+        with stream['lock']:
+            # Once the window is full, each step carries one reading past it
+            drifts = len(stream['window']) == self.time_steps
+            stream['window'].append(reading)
+
+            if not self.stateful:
+                window = self.normalize(np.stack(stream['window']))
+                return float(np.asarray(self.predict_fn(window[None]))[0, 0])
+
+            stream['since_resync'] += drifts
+            if stream['since_resync'] >= self.resync_every:
+                # Exact state over the true window, dropping older history
+                window = self.normalize(np.stack(stream['window']))
+                output, stream['states'] = self.model.forward(window[None])
+                stream['since_resync'] = 0
+            else:
+                output, stream['states'] = self.model.forward(self.normalize(reading)[None, None],
+                                                              stream['states'])
+            return float(output[0, 0])
+
+    def adopt(self, other):
+        """Take over another predictor's streams, e.g. when a new model version goes live
+
+        Windows are copied and every stream resyncs over its window on the
+        next reading, as the other model's states mean nothing to this one.
+        """
+        with other.lock:
+            streams = list(other.streams.items())
+        windows = {}
+        for key, stream in streams:
+            with stream['lock']:
+                windows[key] = list(stream['window'])
+        with self.lock:
+            for key, window in windows.items():
+                self.streams[key] = self.new_stream(window[-self.time_steps:], self.resync_every)
@@ -0,0 +1,15 @@
+from flask import Blueprint, jsonify
+from models.loader import model_loader
+
+health_bp = Blueprint('health', __name__)
+
+@health_bp.route('/live', methods=['GET'])
+def live():
+    """The process is up and serving requests."""
+    return jsonify({'status': 'alive'})
+
+@health_bp.route('/ready', methods=['GET'])
+def ready():
+    """Whether the model is loaded and warmed up; 503 until it is."""
+    status = model_loader.status()
+    return jsonify(status), 200 if status['status'] == 'ready' else 503
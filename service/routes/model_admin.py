@@ -0,0 +1,49 @@
+import hmac
+from functools import wraps
+from flask import Blueprint, request, jsonify
+import config
+from models import registry
+from models.loader import model_loader
+
+model_admin_bp = Blueprint('model_admin', __name__)
+
+def require_admin_token(view):
+    """Only callers presenting MODEL_ADMIN_TOKEN may change which model serves."""
+    @wraps(view)
+    def guarded(*args, **kwargs):
+        if not config.MODEL_ADMIN_TOKEN:
+            return jsonify({'status': 'error', 'message': 'MODEL_ADMIN_TOKEN is not configured'}), 403
+        token = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+        if not hmac.compare_digest(token.encode(), config.MODEL_ADMIN_TOKEN.encode()):
+            return jsonify({'status': 'error', 'message': 'Invalid admin token'}), 401
+        return view(*args, **kwargs)
+    return guarded
+
+@model_admin_bp.route('', methods=['GET'])
+def list_models():
+    """Published versions and what is serving or shadowing now."""
+    versions = []
+    if config.MODEL_REGISTRY:
+        for version in registry.list_versions(config.MODEL_REGISTRY):
+            info = registry.load_version(config.MODEL_REGISTRY, version)
+            versions.append(dict(info['manifest'], n_features=len(info['schema']['feature_columns'])))
+    return jsonify({'versions': versions, **model_loader.status()})
+
+@model_admin_bp.route('/activate', methods=['POST'])
+@require_admin_token
+def activate_model():
+    """Load a version in the background and swap it in, or shadow it with {"shadow": true}."""
+    body = request.get_json(silent=True) or {}
+    version = body.get('version')
+    if version and not config.MODEL_REGISTRY:
+        return jsonify({'status': 'error', 'message': 'MODEL_REGISTRY is not configured'}), 400
+    if not model_loader.activate(version, shadow=bool(body.get('shadow'))):
+        return jsonify({'status': 'busy', 'swap': model_loader.swap}), 409
+    return jsonify({'status': 'loading', 'swap': model_loader.swap}), 202
+
+@model_admin_bp.route('/shadow', methods=['DELETE'])
+@require_admin_token
+def stop_shadow():
+    """Stop scoring the shadow model."""
+    model_loader.stop_shadow()
+    return jsonify({'status': 'success', 'shadow': None})
@@ -1,16 +1,15 @@
 from flask import Blueprint, request, jsonify, Response
 from utils.db import get_db_connection
-from models.maintenance_predictor import MaintenancePredictor
-import pandas as pd
-import numpy as np
-from datetime import datetime, timedelta
+from models.loader import model_loader, ModelNotReady
+from datetime import timedelta
 import json
 import time
+import uuid
 
 simulation_bp = Blueprint('simulation', __name__)
 
-# Load AI model
-predictor = MaintenancePredictor()
+# Streaming state key of the simulated machine
+SIMULATION_STREAM = 'simulation-5000'
 
 # Store simulation state
 simulation_state = {
@@ -175,7 +174,13 @@ def get_sensor_data(machine_id):
 def stream_predictions():
     """Stream predictions in real-time."""
     def generate():
+        # Each client replays machine 5000 from the start with its own state
+        stream_key = f"stream-{uuid.uuid4().hex}"
+        conn = cursor = predictor = None
         try:
+            # Waits for the model if it is still loading
+            predictor = model_loader.get()
+
             # Connect to the database
             conn = get_db_connection()
             cursor = conn.cursor()
@@ -207,38 +212,14 @@ def stream_predictions():
                 columns = [desc[0] for desc in cursor.description]
                 sensor_data = dict(zip(columns, row))
 
-                # Prepare data for prediction
-                feature_columns = [
-                    'temperature', 'vibration', 'load', 'cycle_time', 'power_consumption',
-                    'feature_6', 'feature_7', 'feature_8', 'feature_9', 'feature_10',
-                    'feature_11', 'feature_12', 'feature_13', 'feature_14', 'feature_15',
-                    'feature_16', 'feature_17', 'feature_18', 'feature_19', 'feature_20',
-                    'feature_21', 'feature_22', 'feature_23', 'feature_24', 'feature_25',
-                    'feature_26', 'feature_27', 'feature_28'
-                ]
-
-                # Create a DataFrame with the current data point
-                df = pd.DataFrame([sensor_data])
-                
-                # Add missing features with default values
-                for col in feature_columns:
-                    if col not in df.columns:
-                        df[col] = 0
-
-                # Convert to numeric and handle missing values
-                df = df[feature_columns].apply(pd.to_numeric, errors='coerce').fillna(0)
-
-                # Convert to NumPy array
-                data = df.to_numpy(dtype='float32')
-
-                # Reshape for the model (1 timestep, 28 features)
-                data = data.reshape((1, 1, 28))
-
-                # Run prediction
-                prediction = predictor.predict(data)
+                # Advance this stream's LSTM state by the new reading; fetched
+                # each time so the stream follows a hot-swapped model, which
+                # builds its input from the columns in its own feature schema
+                predictor = model_loader.get()
+                prediction = {'prediction': predictor.predict_record(stream_key, sensor_data)}
 
                 # Yield the prediction
-                yield f"data: {json.dumps({'prediction': prediction.to_dict(orient='records')[0]})}\n\n"
+                yield f"data: {json.dumps({'prediction': prediction})}\n\n"
 
                 # Move to next hour
                 current_time += timedelta(hours=1)
@@ -249,6 +230,8 @@ def stream_predictions():
         except Exception as e:
             yield f"data: {json.dumps({'error': str(e)})}\n\n"
         finally:
+            if predictor:
+                predictor.reset_stream(stream_key)
             if cursor:
                 cursor.close()
             if conn:
@@ -259,6 +242,11 @@ def stream_predictions():
 @simulation_bp.route('/simulate', methods=['POST'])
 def simulate():
     """Simulate streaming historical data for machine 5000."""
+    try:
+        predictor = model_loader.get()
+    except ModelNotReady as e:
+        return jsonify({'status': 'unavailable', 'message': str(e)}), 503
+
     try:
         # Connect to the database
         conn = get_db_connection()
@@ -276,6 +264,7 @@ def simulate():
             start_time = cursor.fetchone()[0]
             simulation_state['current_timestamp'] = start_time
             simulation_state['is_running'] = True
+            predictor.reset_stream(SIMULATION_STREAM)
 
         # Get the next hour of data
         current_time = simulation_state['current_timestamp']
@@ -302,37 +291,10 @@ def simulate():
         columns = [desc[0] for desc in cursor.description]
         sensor_data = dict(zip(columns, row))
 
-        # Prepare data for prediction
-        feature_columns = [
-            'temperature', 'vibration', 'load', 'cycle_time', 'power_consumption',
-            'feature_6', 'feature_7', 'feature_8', 'feature_9', 'feature_10',
-            'feature_11', 'feature_12', 'feature_13', 'feature_14', 'feature_15',
-            'feature_16', 'feature_17', 'feature_18', 'feature_19', 'feature_20',
-            'feature_21', 'feature_22', 'feature_23', 'feature_24', 'feature_25',
-            'feature_26', 'feature_27', 'feature_28'
-        ]
-
-        # Create a DataFrame with the current data point
-        df = pd.DataFrame([sensor_data])
-        
-        # Add missing features with default values
-        for col in feature_columns:
-            if col not in df.columns:
-                df[col] = 0
-
-        # Convert to numeric and handle missing values
-        df = df[feature_columns].apply(pd.to_numeric, errors='coerce').fillna(0)
-
-        # Convert to NumPy array
-        data = df.to_numpy(dtype='float32')
-
-        # Reshape for the model (24 timesteps, 28 features)
-        # Repeat the current data point 24 times to match the expected shape
-        data = np.repeat(data, 24, axis=0)
-        data = data.reshape((1, 24, 28))
-
-        # Run prediction
-        prediction = predictor.predict(data)
+        # Advance the simulated machine's LSTM state by this hour's reading,
+        # the model sees the real history instead of one row repeated; its
+        # input is built from the columns in the model's feature schema
+        prediction = {'prediction': predictor.predict_record(SIMULATION_STREAM, sensor_data)}
 
         # Update simulation state
         simulation_state['current_timestamp'] = next_hour
@@ -346,7 +308,7 @@ def simulate():
             'status': 'running',
             'timestamp': current_time.isoformat(),
             'sensor_data': sensor_data,
-            'prediction': prediction.to_dict(orient='records')[0]
+            'prediction': prediction
         })
 
     except Exception as e:
@@ -366,4 +328,6 @@ def reset_simulation():
     """Reset the simulation to the beginning."""
     simulation_state['is_running'] = False
     simulation_state['current_timestamp'] = None
+    if model_loader.predictor:
+        model_loader.predictor.reset_stream(SIMULATION_STREAM)
     return jsonify({'status': 'success', 'message': 'Simulation reset'})